@@ -2,12 +2,11 @@
 Autonomous Document Processing Agent for Banking Inclusion
 """
 
-import json
 import uuid
 import asyncio
 from typing import Dict, Any, List
 
-from config import logger, CLAUDE_MODEL_ID, safe_json_parse, rate_limited_api_call, bedrock_api_call_with_retry
+from config import logger, CLAUDE_MODEL_ID, dumps_pretty, safe_json_parse, rate_limited_api_call, bedrock_api_call_with_retry
 from models.base_agent import TrueAgent
 from models.data_models import AgentGoal
 
@@ -151,9 +150,9 @@ class AutonomousDocumentAgent(TrueAgent):
         
         # Use a simple string concatenation instead of problematic f-string
         strategy_prompt = "You are an autonomous document processing agent choosing the best strategy.\n\n"
-        strategy_prompt += f"Customer Context: {json.dumps(safe_customer_data, indent=2)}\n\n"
+        strategy_prompt += f"Customer Context: {dumps_pretty(safe_customer_data)}\n\n"
         strategy_prompt += f"Document Characteristics:\n- Size: {doc_size} bytes\n- Has Document: {doc_size > 0}\n\n"
-        strategy_prompt += f"Available Strategies: {json.dumps(self.processing_strategies, indent=2)}\n\n"
+        strategy_prompt += f"Available Strategies: {dumps_pretty(self.processing_strategies)}\n\n"
         strategy_prompt += "Autonomously choose the best strategy considering:\n"
         strategy_prompt += "1. Your primary goal of maximum accuracy\n"
         strategy_prompt += "2. Customer importance and expectations\n"
@@ -164,7 +163,7 @@ class AutonomousDocumentAgent(TrueAgent):
 
         try:
             # Use retry mechanism for Bedrock API calls
-            response = await bedrock_api_call_with_retry(
+            result = await bedrock_api_call_with_retry(
                 self.aws_clients['bedrock'],
                 CLAUDE_MODEL_ID,
                 {
@@ -172,10 +171,10 @@ class AutonomousDocumentAgent(TrueAgent):
                     "max_tokens": 800,
                     "messages": [{"role": "user", "content": strategy_prompt}],
                     "temperature": 0.3
-                }
+                },
+                decode=True
             )
             
-            result = json.loads(response['body'].read())
             ai_response = result['content'][0]['text']
             
             # Use safe JSON parsing with fallback
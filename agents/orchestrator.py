@@ -2,14 +2,12 @@
 Autonomous Orchestrator for coordinating multiple agents
 """
 
-import json
 import uuid
 import asyncio
-import streamlit as st
 from typing import Dict, Any, List
 from dataclasses import asdict
 
-from config import logger, CLAUDE_MODEL_ID, safe_json_parse, rate_limited_api_call, bedrock_api_call_with_retry
+from config import logger, CLAUDE_MODEL_ID, dumps_pretty, safe_json_parse, rate_limited_api_call, bedrock_api_call_with_retry
 from agents.document_agent import AutonomousDocumentAgent
 from agents.risk_agent import AutonomousRiskAgent
 
@@ -25,6 +23,11 @@ class AutonomousOrchestrator:
         }
         self.negotiation_history = []
         self.coordination_strategies = ["sequential", "parallel", "negotiated", "competitive"]
+        self.status_messages: List[str] = []  # progress updates, rendered by the UI thread
+    
+    def _post_status(self, message: str):
+        """Record a progress update (processing may run off the Streamlit script thread)"""
+        self.status_messages.append(message)
     
     async def autonomous_coordination(self, application_data: Dict) -> Dict:
         """Autonomous coordination of multiple agents"""
@@ -68,27 +71,21 @@ class AutonomousOrchestrator:
     async def _negotiate_coordination_strategy(self, application_data: Dict) -> Dict:
         """Let agents negotiate how they want to coordinate"""
         
-        # Get each agent's preference for coordination
-        doc_preference = await self.agents['document'].negotiate_with_agent(
+        # Get each agent's preference for coordination; both agents are local, so one call yields both
+        doc_preference, risk_preference = await self.agents['document'].negotiate_jointly(
             self.agents['risk'],
             "coordination_strategy",
             application_data
         )
         
-        risk_preference = await self.agents['risk'].negotiate_with_agent(
-            self.agents['document'],
-            "coordination_strategy", 
-            application_data
-        )
-        
         # Orchestrator facilitates negotiation
         negotiation_prompt = f"""You are an autonomous orchestrator facilitating agent coordination.
 
 Document Agent Preference:
-{json.dumps(doc_preference, indent=2)}
+{dumps_pretty(doc_preference)}
 
 Risk Agent Preference:
-{json.dumps(risk_preference, indent=2)}
+{dumps_pretty(risk_preference)}
 
 Available Strategies:
 - sequential: Document agent first, then risk agent (traditional)
@@ -97,7 +94,7 @@ Available Strategies:
 - competitive: Agents work independently and best result wins
 
 Application Context:
-{json.dumps(application_data.get('customer_data', {}), indent=2)}
+{dumps_pretty(application_data.get('customer_data', {}))}
 
 Determine the best coordination strategy considering:
 1. Agent preferences and capabilities
@@ -121,7 +118,7 @@ Respond in JSON:
 
         try:
             # Use retry mechanism for Bedrock API calls
-            response = await bedrock_api_call_with_retry(
+            result = await bedrock_api_call_with_retry(
                 self.aws_clients['bedrock'],
                 CLAUDE_MODEL_ID,
                 {
@@ -129,10 +126,10 @@ Respond in JSON:
                     "max_tokens": 1000,
                     "messages": [{"role": "user", "content": negotiation_prompt}],
                     "temperature": 0.3
-                }
+                },
+                decode=True
             )
             
-            result = json.loads(response['body'].read())
             ai_response = result['content'][0]['text']
             
             # Use safe JSON parsing with fallback
@@ -156,13 +153,13 @@ Respond in JSON:
         """Sequential autonomous processing"""
         
         # Document agent processes first
-        st.info("🤖 Document Agent: Processing autonomously...")
+        self._post_status("🤖 Document Agent: Processing autonomously...")
         doc_data = self._inject_document_bytes(application_data)
         doc_result = await self.agents['document'].autonomous_process(doc_data)
 
         # Risk agent processes with document results
         enhanced_data = {**application_data, 'document_result': doc_result}
-        st.info("🤖 Risk Agent: Processing autonomously...")
+        self._post_status("🤖 Risk Agent: Processing autonomously...")
         risk_result = await self.agents['risk'].autonomous_process(enhanced_data)
         
         return {
@@ -176,7 +173,7 @@ Respond in JSON:
     async def _parallel_processing(self, application_data: Dict) -> Dict:
         """Parallel autonomous processing"""
         
-        st.info("🤖 Both Agents: Processing in parallel...")
+        self._post_status("🤖 Both Agents: Processing in parallel...")
         
         # Both agents process simultaneously with proper data
         doc_data = self._inject_document_bytes(application_data)
@@ -196,26 +193,29 @@ Respond in JSON:
     async def _negotiated_processing(self, application_data: Dict) -> Dict:
         """Negotiated collaborative processing"""
         
-        st.info("🤖 Agents: Collaborating and negotiating...")
+        self._post_status("🤖 Agents: Collaborating and negotiating...")
         
         # Document agent starts
         doc_data = self._inject_document_bytes(application_data)
         doc_result = await self.agents['document'].autonomous_process(doc_data)
         
-        # Agents negotiate based on initial results
-        negotiation = await self.agents['document'].negotiate_with_agent(
-            self.agents['risk'],
-            "processing_collaboration",
-            {'document_result': doc_result}
+        # Agents negotiate based on initial results while the risk agent
+        # works on the document results concurrently
+        risk_result, negotiation = await asyncio.gather(
+            self.agents['risk'].autonomous_process({**application_data, 'document_result': doc_result}),
+            self.agents['document'].negotiate_with_agent(
+                self.agents['risk'],
+                "processing_collaboration",
+                {'document_result': doc_result}
+            )
         )
         
-        # Risk agent processes with negotiated approach
-        enhanced_data = {
-            **application_data, 
-            'document_result': doc_result,
-            'negotiation_outcome': negotiation
-        }
-        risk_result = await self.agents['risk'].autonomous_process(enhanced_data)
+        # A negotiation that sets requirements changes the approach, so the risk agent
+        # refines its finished assessment with one extra call instead of re-running
+        if negotiation.get('must_have_requirements'):
+            risk_result = await self.agents['risk'].refine_with_negotiation(risk_result, negotiation)
+        else:
+            risk_result = {**risk_result, 'negotiation_outcome': negotiation}
         
         return {
             'processing_type': 'negotiated',
@@ -227,33 +227,11 @@ Respond in JSON:
     async def _autonomous_decision_synthesis(self, agent_results: Dict) -> Dict:
         """Autonomous synthesis of agent decisions"""
         
-        # Remove any bytes data from agent results for JSON serialization
-        safe_agent_results = {}
-        for k, v in agent_results.items():
-            if isinstance(v, bytes):
-                continue
-            elif isinstance(v, dict):
-                # Recursively clean nested dictionaries
-                safe_v = {}
-                for k2, v2 in v.items():
-                    if not isinstance(v2, bytes):
-                        try:
-                            json.dumps(v2)
-                            safe_v[k2] = v2
-                        except (TypeError, ValueError):
-                            continue
-                safe_agent_results[k] = safe_v
-            else:
-                try:
-                    json.dumps(v)
-                    safe_agent_results[k] = v
-                except (TypeError, ValueError):
-                    continue
-        
+        # Binary values at any depth are summarized by dumps_pretty, so results serialize in one pass
         synthesis_prompt = f"""You are an autonomous orchestrator synthesizing agent decisions.
 
 Agent Processing Results:
-{json.dumps(safe_agent_results, indent=2)}
+{dumps_pretty(agent_results)}
 
 Each agent has processed autonomously with their own goals, learning, and adaptations.
 
@@ -283,7 +261,7 @@ Synthesize into final decision in JSON:
 
         try:
             # Use retry mechanism for Bedrock API calls
-            response = await bedrock_api_call_with_retry(
+            result = await bedrock_api_call_with_retry(
                 self.aws_clients['bedrock'],
                 CLAUDE_MODEL_ID,
                 {
@@ -291,10 +269,10 @@ Synthesize into final decision in JSON:
                     "max_tokens": 1500,
                     "messages": [{"role": "user", "content": synthesis_prompt}],
                     "temperature": 0.2
-                }
+                },
+                decode=True
             )
             
-            result = json.loads(response['body'].read())
             ai_response = result['content'][0]['text']
             
             # Use safe JSON parsing with fallback
@@ -2,12 +2,11 @@
 Autonomous Risk Assessment Agent for Inclusive Banking
 """
 
-import json
 import uuid
 import asyncio
 from typing import Dict, Any, List
 
-from config import logger, CLAUDE_MODEL_ID, safe_json_parse, rate_limited_api_call, bedrock_api_call_with_retry
+from config import logger, CLAUDE_MODEL_ID, dumps_pretty, safe_json_parse, rate_limited_api_call, bedrock_api_call_with_retry
 from models.base_agent import TrueAgent
 from models.data_models import AgentGoal
 
@@ -179,13 +178,13 @@ Document Assessment:
 - Has Results: {len(document_result.get('execution_result', {}).get('step_results', [])) > 0}
 
 Available Risk Models:
-{json.dumps(self.risk_models, indent=2)}
+{dumps_pretty(self.risk_models)}
 
 Your Goals:
-{json.dumps([{"goal_type": goal.goal_type, "description": goal.description} for goal in self.goals], indent=2)}
+{dumps_pretty([{"goal_type": goal.goal_type, "description": goal.description} for goal in self.goals])}
 
 Past Model Performance:
-{json.dumps([m.action_taken + " -> " + str(m.success_score) for m in self.memory_bank[-5:]], indent=2) if self.memory_bank else "No prior experience"}
+{dumps_pretty([m.action_taken + " -> " + str(m.success_score) for m in self._recent_memories(5)]) if self.memory_bank else "No prior experience"}
 
 Autonomously choose the best risk model considering:
 1. Your goal of high accuracy with low false positives
@@ -208,7 +207,7 @@ Respond in JSON:
 
         try:
             # Use retry mechanism for Bedrock API calls
-            response = await bedrock_api_call_with_retry(
+            result = await bedrock_api_call_with_retry(
                 self.aws_clients['bedrock'],
                 CLAUDE_MODEL_ID,
                 {
@@ -216,10 +215,10 @@ Respond in JSON:
                     "max_tokens": 1000,
                     "messages": [{"role": "user", "content": model_prompt}],
                     "temperature": 0.2
-                }
+                },
+                decode=True
             )
             
-            result = json.loads(response['body'].read())
             ai_response = result['content'][0]['text']
             
             # Use safe JSON parsing with fallback
@@ -243,41 +242,23 @@ Respond in JSON:
     async def _perform_autonomous_risk_analysis(self, customer_data: Dict, document_result: Dict, model_choice: Dict) -> Dict:
         """Perform autonomous risk analysis using chosen model"""
         
-        # Clean data for JSON serialization
-        safe_customer_data = {}
-        for k, v in customer_data.items():
-            if not isinstance(v, bytes):
-                try:
-                    json.dumps(v)
-                    safe_customer_data[k] = v
-                except (TypeError, ValueError):
-                    continue
-        
-        safe_document_result = {}
-        for k, v in document_result.items():
-            if not isinstance(v, bytes):
-                try:
-                    json.dumps(v)
-                    safe_document_result[k] = v
-                except (TypeError, ValueError):
-                    continue
-        
+        # dumps_pretty summarizes binary values, so the inputs are serialized as-is
         analysis_prompt = f"""You are an autonomous risk assessment agent performing comprehensive analysis.
 
 Risk Model Chosen: {model_choice['model']}
 Model Reasoning: {model_choice.get('reasoning', 'No reasoning provided')}
 
 Customer Data:
-{json.dumps(safe_customer_data, indent=2)}
+{dumps_pretty(customer_data)}
 
 Document Analysis:
-{json.dumps(safe_document_result, indent=2)}
+{dumps_pretty(document_result)}
 
 Your Goals:
-{json.dumps([{"goal_type": goal.goal_type, "description": goal.description} for goal in self.goals], indent=2)}
+{dumps_pretty([{"goal_type": goal.goal_type, "description": goal.description} for goal in self.goals])}
 
 Learning from Past Cases:
-{json.dumps([m.learned_insight for m in self.memory_bank[-3:]], indent=2) if self.memory_bank else "No prior learning"}
+{dumps_pretty([m.learned_insight for m in self._recent_memories(3)]) if self.memory_bank else "No prior learning"}
 
 Perform autonomous risk assessment considering:
 1. Credit risk factors (income, employment, age)
@@ -323,7 +304,7 @@ Provide comprehensive assessment in JSON:
 
         try:
             # Use retry mechanism for Bedrock API calls
-            response = await bedrock_api_call_with_retry(
+            result = await bedrock_api_call_with_retry(
                 self.aws_clients['bedrock'],
                 CLAUDE_MODEL_ID,
                 {
@@ -331,10 +312,10 @@ Provide comprehensive assessment in JSON:
                     "max_tokens": 2000,
                     "messages": [{"role": "user", "content": analysis_prompt}],
                     "temperature": 0.1  # Low temperature for consistent risk assessment
-                }
+                },
+                decode=True
             )
             
-            result = json.loads(response['body'].read())
             ai_response = result['content'][0]['text']
             
             # Use safe JSON parsing with fallback
@@ -413,6 +394,79 @@ Provide comprehensive assessment in JSON:
             }
         }
     
+    async def refine_with_negotiation(self, risk_result: Dict, negotiation: Dict) -> Dict:
+        """Lightweight second pass that adjusts a finished risk analysis to a negotiated approach"""
+        
+        steps = (risk_result.get('execution_result') or {}).get('step_results') or []
+        risk_analysis = next(
+            (step['learned_info']['risk_analysis'] for step in reversed(steps)
+             if isinstance((step.get('learned_info') or {}).get('risk_analysis'), dict)),
+            None
+        )
+        if risk_analysis is None:
+            return {**risk_result, 'negotiation_outcome': negotiation}
+        
+        refinement_prompt = f"""You are an autonomous risk assessment agent refining a completed assessment.
+
+Current Assessment:
+{dumps_pretty({key: risk_analysis.get(key) for key in ('risk_assessment', 'compliance_assessment', 'autonomous_decision')})}
+
+Negotiated Processing Approach (agreed with the document agent):
+{dumps_pretty(negotiation)}
+
+Adjust the assessment only where the negotiated requirements call for it. Keep unchanged values as they are.
+
+Respond in JSON:
+{{
+    "risk_assessment": {{"overall_risk_score": 1-100, "risk_category": "Low/Medium/High/Critical"}},
+    "autonomous_decision": {{
+        "recommendation": "Approve/Reject/Manual_Review/Request_Info",
+        "confidence": 0.0-1.0,
+        "reasoning": "how the negotiated approach changed the decision"
+    }},
+    "negotiation_adjustments": ["adjustment1", "adjustment2"]
+}}"""
+
+        try:
+            result = await bedrock_api_call_with_retry(
+                self.aws_clients['bedrock'],
+                CLAUDE_MODEL_ID,
+                {
+                    "anthropic_version": "bedrock-2023-05-31",
+                    "max_tokens": 600,
+                    "messages": [{"role": "user", "content": refinement_prompt}],
+                    "temperature": 0.1
+                },
+                decode=True
+            )
+            refinement = safe_json_parse(result['content'][0]['text'], {})
+        except Exception as e:
+            logger.error(f"Negotiation refinement failed for {self.agent_id}: {str(e)}")
+            refinement = {}
+        
+        if not refinement:
+            return {**risk_result, 'negotiation_outcome': negotiation}
+        
+        refined_analysis = {
+            **risk_analysis,
+            'risk_assessment': {**risk_analysis.get('risk_assessment', {}), **refinement.get('risk_assessment', {})},
+            'autonomous_decision': {**risk_analysis.get('autonomous_decision', {}), **refinement.get('autonomous_decision', {})},
+            'negotiation_adjustments': refinement.get('negotiation_adjustments', [])
+        }
+        refinement_step = {
+            'step': {'action': 'refine_with_negotiation'},
+            'success': refined_analysis['autonomous_decision'].get('confidence', 0.5),
+            'outcome': "Risk assessment refined with the negotiated approach",
+            'learned_info': {'risk_analysis': refined_analysis},
+            'next_action_recommendation': self._recommend_risk_action(refined_analysis)
+        }
+        
+        return {
+            **risk_result,
+            'execution_result': {**risk_result['execution_result'], 'step_results': [*steps, refinement_step]},
+            'negotiation_outcome': negotiation
+        }
+    
     def _recommend_risk_action(self, risk_analysis: Dict) -> str:
         """Recommend next action based on risk analysis"""
         
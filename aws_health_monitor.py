@@ -4,82 +4,92 @@ AWS Health Monitor for Banking AI System
 Quick health check script to monitor AWS services
 """
 
+import asyncio
 import boto3
-import json
+import threading
+from botocore.config import Config
 from datetime import datetime
 from config import AWS_REGION, CLAUDE_MODEL_ID
 
 
-def quick_health_check():
-    """Quick health check for all AWS services"""
+# Short timeouts and no retries so one unhealthy service can't stall the whole check
+_PROBE_CONFIG = Config(connect_timeout=2, read_timeout=5, retries={'max_attempts': 1})
+
+# One session for the process: credentials and endpoints are resolved once, clients are reused
+_SESSION = boto3.session.Session(region_name=AWS_REGION)
+
+
+_CLIENTS = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def _client(service_name):
+    # Clients are thread-safe once built, but Session.client() is not, so creation is serialized
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(service_name)
+        if client is None:
+            client = _CLIENTS[service_name] = _SESSION.client(service_name, config=_PROBE_CONFIG)
+    return client
+
+
+def _check_authentication():
+    identity = _client('sts').get_caller_identity()
+    return '✅ WORKING', f"✅ WORKING (Account: {identity['Account']})"
+
+
+def _check_s3():
+    buckets = _client('s3').list_buckets()
+    status = f'✅ WORKING ({len(buckets["Buckets"])} buckets)'
+    return status, status
+
+
+def _check_dynamodb():
+    tables = _client('dynamodb').list_tables()
+    status = f'✅ WORKING ({len(tables["TableNames"])} tables)'
+    return status, status
+
+
+def _check_textract():
+    # Textract doesn't have a simple list operation, so we just test client creation
+    _client('textract')
+    return '✅ WORKING', '✅ WORKING'
+
+
+def _check_bedrock():
+    # Control-plane lookup of the configured model: proves access without invoking (and paying for) it
+    model = _client('bedrock').get_foundation_model(modelIdentifier=CLAUDE_MODEL_ID)
+    status = f"✅ WORKING ({model['modelDetails']['modelId']} accessible)"
+    return status, status
+
+
+# (status key, display label, probe) in report order
+_HEALTH_PROBES = [
+    ('authentication', '🔐 Authentication', _check_authentication),
+    ('s3', '📦 S3', _check_s3),
+    ('dynamodb', '🗄️  DynamoDB', _check_dynamodb),
+    ('textract', '📄 Textract', _check_textract),
+    ('bedrock', '🧠 Bedrock', _check_bedrock),
+]
+
+
+async def quick_health_check():
+    """Quick health check for all AWS services (probes run concurrently)"""
     print(f"🔍 AWS Health Check - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("=" * 50)
     
-    services_status = {}
-    
-    # Check Authentication
-    try:
-        sts = boto3.client('sts', region_name=AWS_REGION)
-        identity = sts.get_caller_identity()
-        services_status['authentication'] = '✅ WORKING'
-        print(f"🔐 Authentication: ✅ WORKING (Account: {identity['Account']})")
-    except Exception as e:
-        services_status['authentication'] = f'❌ FAILED: {str(e)[:50]}'
-        print(f"🔐 Authentication: ❌ FAILED")
-    
-    # Check S3
-    try:
-        s3 = boto3.client('s3', region_name=AWS_REGION)
-        buckets = s3.list_buckets()
-        services_status['s3'] = f'✅ WORKING ({len(buckets["Buckets"])} buckets)'
-        print(f"📦 S3: ✅ WORKING ({len(buckets['Buckets'])} buckets)")
-    except Exception as e:
-        services_status['s3'] = f'❌ FAILED: {str(e)[:50]}'
-        print(f"📦 S3: ❌ FAILED")
-    
-    # Check DynamoDB
-    try:
-        dynamodb = boto3.client('dynamodb', region_name=AWS_REGION)
-        tables = dynamodb.list_tables()
-        services_status['dynamodb'] = f'✅ WORKING ({len(tables["TableNames"])} tables)'
-        print(f"🗄️  DynamoDB: ✅ WORKING ({len(tables['TableNames'])} tables)")
-    except Exception as e:
-        services_status['dynamodb'] = f'❌ FAILED: {str(e)[:50]}'
-        print(f"🗄️  DynamoDB: ❌ FAILED")
-    
-    # Check Textract
-    try:
-        textract = boto3.client('textract', region_name=AWS_REGION)
-        # Textract doesn't have a simple list operation, so we just test client creation
-        services_status['textract'] = '✅ WORKING'
-        print(f"📄 Textract: ✅ WORKING")
-    except Exception as e:
-        services_status['textract'] = f'❌ FAILED: {str(e)[:50]}'
-        print(f"📄 Textract: ❌ FAILED")
+    results = await asyncio.gather(
+        *(asyncio.to_thread(probe) for _, _, probe in _HEALTH_PROBES),
+        return_exceptions=True
+    )
     
-    # Check Bedrock (test the configured model)
-    try:
-        bedrock_runtime = boto3.client('bedrock-runtime', region_name=AWS_REGION)
-        
-        # Quick test with the configured model
-        test_request = {
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": 10,
-            "temperature": 0.1,
-            "messages": [{"role": "user", "content": "Hi"}]
-        }
-        
-        response = bedrock_runtime.invoke_model(
-            modelId=CLAUDE_MODEL_ID,
-            body=json.dumps(test_request)
-        )
-        
-        services_status['bedrock'] = '✅ WORKING (AI models accessible)'
-        print(f"🧠 Bedrock: ✅ WORKING (AI models accessible)")
-        
-    except Exception as e:
-        services_status['bedrock'] = f'❌ FAILED: {str(e)[:50]}'
-        print(f"🧠 Bedrock: ❌ FAILED")
+    services_status = {}
+    for (key, label, _), result in zip(_HEALTH_PROBES, results):
+        if isinstance(result, Exception):
+            services_status[key] = f'❌ FAILED: {str(result)[:50]}'
+            print(f"{label}: ❌ FAILED")
+        else:
+            services_status[key], detail = result
+            print(f"{label}: {detail}")
     
     # Overall Status
     working_services = sum(1 for status in services_status.values() if '✅' in status)
@@ -105,7 +115,8 @@ def check_application_status():
     
     try:
         from utils.aws_clients import get_aws_clients
-        aws_clients = get_aws_clients()
+        # Clients are created lazily; materialise them all so construction errors surface here
+        aws_clients = dict(get_aws_clients())
         
         if aws_clients:
             print("✅ Application: READY TO START")
@@ -124,7 +135,7 @@ def check_application_status():
 
 if __name__ == "__main__":
     # Run health check
-    health_status = quick_health_check()
+    health_status = asyncio.run(quick_health_check())
     
     # Check application status
     app_ready = check_application_status()
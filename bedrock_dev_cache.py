@@ -0,0 +1,140 @@
+# bedrock_dev_cache.py - On-disk caches for the Bedrock setup/probe scripts
+import functools
+import hashlib
+import json
+import orjson
+import os
+import shelve
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+_CACHE_PATH = '.bedrock_cache'
+_CACHE_LOCK = threading.Lock()  # shelve is not safe for concurrent access from the probe threads
+_MODELS_TTL = 24 * 3600  # the foundation model catalogue changes rarely
+_IDENTITY_PATH = os.path.expanduser('~/.cache/banking-ai/identity.json')
+_IDENTITY_TTL = 3600
+
+def _normalize(text):
+    """Collapse whitespace and case so trivially different prompts share a cache entry"""
+    return ' '.join(text.split()).lower()
+
+def _converse_request(prompt, max_tokens):
+    """Converse arguments shared by every model family"""
+    return {
+        'messages': [{'role': 'user', 'content': [{'text': prompt}]}],
+        'inferenceConfig': {'maxTokens': max_tokens}
+    }
+
+def _cache_key(model_id, request):
+    payload = _normalize(json.dumps(request, sort_keys=True))
+    return hashlib.sha256((model_id + payload).encode()).hexdigest()
+
+def cached_converse(bedrock_runtime, model_id, prompt, max_tokens):
+    """converse() reply text, cached on disk by sha256(model + request)"""
+    request = _converse_request(prompt, max_tokens)
+    key = _cache_key(model_id, request)
+    
+    with _CACHE_LOCK, shelve.open(_CACHE_PATH) as cache:
+        text = cache.get(key)
+    if text is not None:
+        return text
+    
+    response = bedrock_runtime.converse(modelId=model_id, **request)
+    text = response['output']['message']['content'][0]['text']
+    with _CACHE_LOCK, shelve.open(_CACHE_PATH) as cache:
+        cache[key] = text
+    return text
+
+def cached_stream(bedrock_runtime, model_id, prompt, max_tokens):
+    """Yield converse_stream() reply text as it arrives; a cached reply is yielded in one piece"""
+    request = _converse_request(prompt, max_tokens)
+    key = _cache_key('stream:' + model_id, request)
+    
+    with _CACHE_LOCK, shelve.open(_CACHE_PATH) as cache:
+        text = cache.get(key)
+    if text is not None:
+        yield text
+        return
+    
+    response = bedrock_runtime.converse_stream(modelId=model_id, **request)
+    pieces = []
+    for event in response['stream']:
+        piece = event.get('contentBlockDelta', {}).get('delta', {}).get('text')
+        if piece:
+            pieces.append(piece)
+            yield piece
+    with _CACHE_LOCK, shelve.open(_CACHE_PATH) as cache:
+        cache[key] = ''.join(pieces)
+
+def _tmp_path(name):
+    return os.path.join(tempfile.gettempdir(), name)
+
+def _store_models(region, summaries):
+    with open(_tmp_path(f"bedrock_models_{region}.json"), 'wb') as f:
+        f.write(orjson.dumps(summaries))
+
+def list_models(bedrock):
+    """list_foundation_models summaries for the client's region, cached on disk for 24h"""
+    path = _tmp_path(f"bedrock_models_{bedrock.meta.region_name}.json")
+    try:
+        if time.time() - os.path.getmtime(path) < _MODELS_TTL:
+            with open(path, 'rb') as f:
+                return orjson.loads(f.read())
+    except (OSError, ValueError):
+        pass
+    
+    summaries = bedrock.list_foundation_models()['modelSummaries']
+    _store_models(bedrock.meta.region_name, summaries)
+    return summaries
+
+def fastest_region(session, regions):
+    """(region, model summaries) for the region whose Bedrock answers fastest; the winner is cached for 24h"""
+    path = _tmp_path('bedrock_fallback_region.txt')
+    try:
+        if time.time() - os.path.getmtime(path) < _MODELS_TTL:
+            with open(path) as f:
+                region = f.read().strip()
+            if region in regions:
+                return region, list_models(session.client('bedrock', region_name=region))
+    except OSError:
+        pass
+    
+    def probe(bedrock):
+        start = time.perf_counter()
+        summaries = bedrock.list_foundation_models()['modelSummaries']
+        return time.perf_counter() - start, bedrock.meta.region_name, summaries
+    
+    # Clients are created here, on the calling thread; only the API calls run in the pool
+    clients = [session.client('bedrock', region_name=region) for region in regions]
+    with ThreadPoolExecutor(max_workers=len(clients)) as pool:
+        futures = [pool.submit(probe, bedrock) for bedrock in clients]
+    results = [future.result() for future in futures if future.exception() is None]
+    if not results:
+        raise RuntimeError(f"Bedrock not reachable in any of {', '.join(regions)}")
+    
+    _, region, summaries = min(results, key=lambda result: result[0])
+    _store_models(region, summaries)
+    with open(path, 'w') as f:
+        f.write(region)
+    return region, summaries
+
+@functools.lru_cache(maxsize=1)
+def caller_identity(sts, access_key):
+    """sts.get_caller_identity() for the given access key, cached in-process and on disk for 1h"""
+    try:
+        if time.time() - os.path.getmtime(_IDENTITY_PATH) < _IDENTITY_TTL:
+            with open(_IDENTITY_PATH, 'rb') as f:
+                cached = orjson.loads(f.read())
+            if cached['access_key'] == access_key:
+                return cached['identity']
+    except (OSError, ValueError, KeyError):
+        pass
+    
+    response = sts.get_caller_identity()
+    identity = {key: response[key] for key in ('UserId', 'Account', 'Arn')}
+    os.makedirs(os.path.dirname(_IDENTITY_PATH), exist_ok=True)
+    with open(_IDENTITY_PATH, 'wb') as f:
+        f.write(orjson.dumps({'access_key': access_key, 'identity': identity}))
+    return identity
@@ -3,6 +3,7 @@ Configuration and constants for the Banking AI System
 """
 
 import logging
+import os
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -11,33 +12,282 @@ logger = logging.getLogger(__name__)
 # AWS Configuration
 AWS_REGION = 'ap-south-1'
 CLAUDE_MODEL_ID = "anthropic.claude-3-haiku-20240307-v1:0"
+# Model for low-stakes bookkeeping calls (plan adaptation, reflection); defaults to the main model
+CLAUDE_FAST_MODEL_ID = os.getenv('CLAUDE_FAST_MODEL_ID', CLAUDE_MODEL_ID)
+
+# Mark stable prompt prefixes with cache_control; only enable for models that support
+# Bedrock prompt caching (Claude 3 Haiku does not)
+BEDROCK_PROMPT_CACHING = os.getenv('BEDROCK_PROMPT_CACHING', 'false').lower() == 'true'
+
+# Keep raw model output (reply previews, raw response excerpts) in segmentation results and logs
+BANKING_DEBUG = os.getenv('BANKING_DEBUG') == '1'
+
+# Shared decision cache (Redis) - optional, process-local cache is used when unset
+REDIS_URL = os.getenv('REDIS_URL')
+DECISION_CACHE_TTL = 3600
+
+# Sustained Bedrock request rate for the account/model (requests per second)
+BEDROCK_TPS = float(os.getenv('BEDROCK_TPS', '2'))
+
+# Upper bound on Bedrock invocations in flight at once (per event loop)
+BEDROCK_MAX_CONCURRENT = int(os.getenv('BEDROCK_MAX_CONCURRENT', '16'))
+
+# botocore retry policy for Bedrock clients: adaptive mode adds jittered backoff and a
+# client-side token bucket that slows down under sustained throttling
+BEDROCK_RETRY_CONFIG = {'max_attempts': 10, 'mode': 'adaptive'}
 
 # API Rate Limiting
 import time
 import asyncio
 import json
 import re
+import hashlib
+import functools
+import random
+from collections.abc import Mapping
+import orjson
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import ClientError, ConnectionError as BotocoreConnectionError, HTTPClientError
+
+
+class AsyncTokenBucket:
+    """Token-bucket rate limiter: allows bursts up to max_rate, then max_rate calls per time_period"""
+    
+    def __init__(self, max_rate: float, time_period: float = 1.0):
+        self.max_rate = max_rate
+        self.time_period = time_period
+        self._tokens = max_rate
+        self._updated = time.monotonic()
+        # Streamlit sessions run on separate threads/loops but share the account quota
+        self._lock = threading.Lock()
+    
+    def _try_take(self) -> float:
+        """Take a token if available; otherwise return seconds until one will be"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.max_rate, self._tokens + (now - self._updated) * self.max_rate / self.time_period)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) * self.time_period / self.max_rate
+    
+    async def acquire(self):
+        while (wait := self._try_take()) > 0:
+            await asyncio.sleep(wait)
+    
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+_bedrock_limiter = AsyncTokenBucket(max_rate=BEDROCK_TPS, time_period=1)
+
+
+class BulkheadFullError(Exception):
+    """Raised instead of queueing behind a bulkhead whose wait queue is already full"""
+
+
+class Bulkhead:
+    """Process-wide cap on concurrent calls with a bounded wait queue; callers beyond the queue fail fast
+    
+    Counted under a thread lock rather than an asyncio.Semaphore so every Streamlit session's loop shares it.
+    """
+    
+    _POLL_SECONDS = 0.05
+    
+    def __init__(self, max_concurrent: int = 16, queue_depth: int = 64):
+        self.max_concurrent = max_concurrent
+        self.queue_depth = queue_depth
+        self._active = 0
+        self._waiting = 0
+        self._lock = threading.Lock()
+    
+    def _try_enter(self) -> bool:
+        with self._lock:
+            if self._active < self.max_concurrent:
+                self._active += 1
+                return True
+            return False
+    
+    async def __aenter__(self):
+        if self._try_enter():
+            return self
+        with self._lock:
+            if self._waiting >= self.queue_depth:
+                raise BulkheadFullError(f"{self._active} calls in flight and {self._waiting} queued")
+            self._waiting += 1
+        try:
+            while not self._try_enter():
+                await asyncio.sleep(self._POLL_SECONDS)
+            return self
+        finally:
+            with self._lock:
+                self._waiting -= 1
+    
+    async def __aexit__(self, *exc_info):
+        with self._lock:
+            self._active -= 1
+        return False
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """CLOSED -> OPEN -> HALF_OPEN breaker: after failure_threshold consecutive failures calls are refused
+    for timeout_duration seconds, then success_threshold successful trial calls close it again"""
+    
+    def __init__(self, failure_threshold: int = 5, timeout_duration: float = 30.0, success_threshold: int = 2):
+        self.failure_threshold = failure_threshold
+        self.timeout_duration = timeout_duration
+        self.success_threshold = success_threshold
+        self.state = 'closed'
+        self._failures = 0
+        self._successes = 0
+        self._opened_at = 0.0
+        # Shared by every Streamlit session thread and event loop
+        self._lock = threading.Lock()
+    
+    def can_execute(self) -> bool:
+        with self._lock:
+            if self.state == 'open':
+                if time.monotonic() - self._opened_at < self.timeout_duration:
+                    return False
+                self.state = 'half_open'
+                self._successes = 0
+            return True
+    
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            if self.state == 'half_open':
+                self._successes += 1
+                if self._successes >= self.success_threshold:
+                    self.state = 'closed'
+    
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == 'half_open' or self._failures >= self.failure_threshold:
+                if self.state != 'open':
+                    logger.warning("Circuit breaker opened after %s failures", self._failures)
+                self.state = 'open'
+                self._opened_at = time.monotonic()
+                self._failures = 0
+
+# Dedicated threads for blocking Bedrock calls, sized to the client connection pool so
+# concurrent agents are not capped by (or compete for) the loop's small default executor
+_BEDROCK_EXECUTOR = ThreadPoolExecutor(max_workers=32, thread_name_prefix='bedrock')
+MAX_BACKOFF_SECONDS = 30.0
+
+
+# Async Redis clients are bound to the loop that created them (each Streamlit run uses its own)
+_REDIS_CLIENTS: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def get_redis_client():
+    """Async Redis client shared by everything on the running event loop, or None if Redis is not configured"""
+    if not REDIS_URL:
+        return None
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+    client = _REDIS_CLIENTS.get(loop)
+    if client is None:
+        try:
+            from redis import asyncio as aioredis
+            client = aioredis.from_url(REDIS_URL)
+        except Exception as e:
+            logger.warning("Redis unavailable, using process-local cache: %s", e)
+            return None
+        _REDIS_CLIENTS[loop] = client
+    return client
+
+
+async def close_redis_client():
+    """Close the running event loop's Redis client and its connection pool"""
+    client = _REDIS_CLIENTS.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        close = getattr(client, 'aclose', None) or client.close
+        await close()
+
+
+def _bytes_default(o):
+    """Serializer hook: summarize binary payloads instead of embedding them"""
+    if isinstance(o, (bytes, bytearray, memoryview)):
+        return {'type': 'binary_data', 'size_bytes': len(o), 'content': 'bytes_object'}
+    if isinstance(o, Mapping):
+        return dict(o)
+    if hasattr(o, '__dict__'):
+        return o.__dict__
+    return str(o)
+
+
+def dumps_pretty(obj) -> str:
+    """Indented JSON for prompt assembly; bytes anywhere in obj are replaced with metadata"""
+    try:
+        return orjson.dumps(obj, default=_bytes_default,
+                            option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
+    except TypeError:
+        return json.dumps(obj, indent=2, default=_bytes_default)
+
+
+_THROTTLING_ERROR_CODES = frozenset({
+    'ThrottlingException',
+    'TooManyRequestsException',
+    'ProvisionedThroughputExceededException',
+    'RequestLimitExceeded',
+})
+
+
+def _is_throttling_error(error: Exception) -> bool:
+    """True for AWS errors whose code signals throttling"""
+    return isinstance(error, ClientError) and error.response.get('Error', {}).get('Code') in _THROTTLING_ERROR_CODES
+
+
+def is_transient_error(error: Exception) -> bool:
+    """True for failures worth retrying or counting against an upstream: throttling, 408/429/5xx,
+    timeouts and connection errors (client errors such as validation failures are not)"""
+    if isinstance(error, (BotocoreConnectionError, HTTPClientError)):
+        return True
+    if not isinstance(error, ClientError):
+        return False
+    status = error.response.get('ResponseMetadata', {}).get('HTTPStatusCode', 0)
+    return _is_throttling_error(error) or status in (408, 429) or status >= 500
+
+
+def decision_cache_key(prefix: str, data) -> str:
+    """Stable cache key (identical across workers and restarts, unlike hash())"""
+    digest = hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+    return f"{prefix}:{digest}"
+
 
 async def rate_limited_api_call(api_call_func, *args, max_retries=3, base_delay=2.0, **kwargs):
     """Enhanced rate-limited API call with exponential backoff"""
     
     for attempt in range(max_retries + 1):
         try:
-            result = api_call_func(*args, **kwargs)
-            # Add base delay after successful call
-            await asyncio.sleep(1.5)  # Increased base delay
-            return result
+            async with _bedrock_limiter:
+                return await asyncio.to_thread(api_call_func, *args, **kwargs)
             
         except Exception as e:
-            if "ThrottlingException" in str(e) or "TooManyRequestsException" in str(e):
+            if _is_throttling_error(e):
                 if attempt < max_retries:
-                    # Exponential backoff: 2s, 4s, 8s, etc.
-                    delay = base_delay * (2 ** attempt)
-                    logger.warning(f"Rate limited (attempt {attempt + 1}/{max_retries + 1}), waiting {delay}s...")
+                    # Exponential backoff with full jitter (capped) so concurrent callers don't retry in lockstep
+                    delay = min(random.uniform(0, base_delay * (2 ** attempt)), MAX_BACKOFF_SECONDS)
+                    logger.warning("Rate limited (attempt %s/%s), waiting %.1fs...", attempt + 1, max_retries + 1, delay)
                     await asyncio.sleep(delay)
                     continue
                 else:
-                    logger.error(f"Max retries ({max_retries}) reached for rate limiting")
+                    logger.error("Max retries (%s) reached for rate limiting", max_retries)
                     raise e
             else:
                 # Non-throttling error, don't retry
@@ -45,59 +295,150 @@ async def rate_limited_api_call(api_call_func, *args, max_retries=3, base_delay=
     
     return None  # Should never reach here
 
-async def bedrock_api_call_with_retry(aws_client, model_id, body, max_retries=3):
-    """Dedicated Bedrock API call with retry logic"""
+# Only these characters can change the scanner state; everything between them is skipped in C
+_JSON_STRUCTURE_RE = re.compile(r'[{}"\\]')
+
+
+class _JsonObjectEnd:
+    """Incremental scanner that reports where the first top-level JSON object closes"""
     
-    for attempt in range(max_retries + 1):
+    __slots__ = ('depth', 'in_string', 'escape')
+    
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+    
+    def feed(self, text: str) -> int:
+        """Index just past the closing brace within text, or -1 while the object is still open"""
+        # A backslash that ended the previous chunk escapes this chunk's first character
+        escaped = 0 if self.escape else -1
+        self.escape = False
+        for match in _JSON_STRUCTURE_RE.finditer(text):
+            i = match.start()
+            if i == escaped:
+                continue
+            char = text[i]
+            if self.in_string:
+                if char == '\\':
+                    escaped = i + 1
+                    self.escape = escaped == len(text)
+                elif char == '"':
+                    self.in_string = False
+            elif char == '{':
+                self.depth += 1
+            elif self.depth:
+                if char == '"':
+                    self.in_string = True
+                elif char == '}':
+                    self.depth -= 1
+                    if not self.depth:
+                        return i + 1
+        return -1
+
+
+def _invoke_model_streaming(aws_client, model_id, body_json: str, stop_at_json_end: bool = False) -> str:
+    """Stream a Claude response and assemble its text deltas (blocking; run off the event loop)
+    
+    With stop_at_json_end the stream is closed as soon as the first top-level JSON object is complete.
+    """
+    response = aws_client.invoke_model_with_response_stream(modelId=model_id, body=body_json)
+    scanner = _JsonObjectEnd() if stop_at_json_end else None
+    parts = []
+    for event in response['body']:
+        chunk = event.get('chunk')
+        if not chunk:
+            continue
+        payload = orjson.loads(chunk['bytes'])
+        if payload.get('type') == 'content_block_delta':
+            text = payload.get('delta', {}).get('text', '')
+            if scanner is not None:
+                end = scanner.feed(text)
+                if end != -1:
+                    parts.append(text[:end])
+                    response['body'].close()
+                    break
+            parts.append(text)
+    return ''.join(parts)
+
+
+def _invoke_model_json(aws_client, model_id, body_json) -> dict:
+    """invoke_model plus reading and decoding the response body (blocking; run off the event loop)"""
+    response = aws_client.invoke_model(modelId=model_id, body=body_json)
+    return orjson.loads(response['body'].read())
+
+
+# asyncio primitives bind to the loop that first waits on them, so keep one semaphore per loop
+_BEDROCK_SEMAPHORES: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def _bedrock_semaphore() -> asyncio.Semaphore:
+    """Concurrency cap for Bedrock calls on the running event loop"""
+    loop = asyncio.get_running_loop()
+    semaphore = _BEDROCK_SEMAPHORES.get(loop)
+    if semaphore is None:
+        semaphore = _BEDROCK_SEMAPHORES[loop] = asyncio.Semaphore(BEDROCK_MAX_CONCURRENT)
+    return semaphore
+
+
+async def bedrock_api_call_with_retry(aws_client, model_id, body, executor=None, stream=False,
+                                      stop_at_json_end=False, decode=False):
+    """Dedicated Bedrock API call
+    
+    Throttling retries (jittered backoff plus client-side rate adaptation) are handled by botocore's
+    adaptive retry mode configured on the client; only the final failure is logged here.
+    The blocking boto3 call always runs off the event loop, on the given executor or the shared
+    Bedrock pool. With stream=True the response is streamed and drained there too and the
+    assembled response text is returned instead of the raw response; stop_at_json_end additionally
+    cuts the stream off once the first top-level JSON object has been received. With decode=True
+    the response body is read and decoded in the executor as well and the parsed dict is returned.
+    body may be a dict or an already-serialized JSON str/bytes request body.
+    """
+    
+    body_json = body if isinstance(body, (str, bytes)) else orjson.dumps(body)
+    
+    if stream:
+        call = functools.partial(_invoke_model_streaming, aws_client, model_id, body_json, stop_at_json_end)
+    elif decode:
+        call = functools.partial(_invoke_model_json, aws_client, model_id, body_json)
+    else:
+        call = functools.partial(aws_client.invoke_model, modelId=model_id, body=body_json)
+    
+    # Bound the fan-out first, then shape the request rate to the account quota
+    async with _bedrock_semaphore():
+        await _bedrock_limiter.acquire()
         try:
-            # Add progressive delay before each call
-            delay = 1.5 + (attempt * 0.5)  # 1.5s, 2s, 2.5s, 3s
-            await asyncio.sleep(delay)
-            
-            response = aws_client.invoke_model(
-                modelId=model_id,
-                body=json.dumps(body)
-            )
-            
-            return response
-            
+            return await asyncio.get_running_loop().run_in_executor(executor or _BEDROCK_EXECUTOR, call)
         except Exception as e:
-            if "ThrottlingException" in str(e) or "TooManyRequestsException" in str(e):
-                if attempt < max_retries:
-                    # Exponential backoff: 3s, 6s, 12s
-                    backoff_delay = 3.0 * (2 ** attempt)
-                    logger.warning(f"Bedrock throttled (attempt {attempt + 1}/{max_retries + 1}), backing off {backoff_delay}s...")
-                    await asyncio.sleep(backoff_delay)
-                    continue
-                else:
-                    logger.error(f"Bedrock max retries ({max_retries}) reached")
-                    raise e
-            else:
-                # Non-throttling error, don't retry
-                raise e
-    
-    return None
+            logger.error("Bedrock call to %s failed: %s", model_id, e)
+            raise
+
+# JSON repair patterns, compiled once
+_CTRL_TABLE = {c: ' ' for c in (*range(0x00, 0x20), *range(0x7f, 0xa0))}
+_WS_RE = re.compile(r'\s+')
+_TRAIL_OBJ_RE = re.compile(r',\s*}')
+_TRAIL_ARR_RE = re.compile(r',\s*]')
+_ADJ_OBJ_RE = re.compile(r'}\s*{')
+_RAW_DECODER = json.JSONDecoder()
 
 def clean_json_string(json_str: str) -> str:
     """
     Advanced JSON cleaning to handle control characters and formatting issues
     """
-    if not json_str:
+    # Without any bracket there is nothing to extract; skip the cleaning passes
+    if not json_str or ('{' not in json_str and '[' not in json_str):
         return "{}"
     
     # Remove all control characters completely (including \n, \r, \t in strings)
-    cleaned = re.sub(r'[\x00-\x1f\x7f-\x9f]', ' ', json_str)
+    cleaned = json_str.translate(_CTRL_TABLE)
     
     # Replace multiple spaces with single space
-    cleaned = re.sub(r'\s+', ' ', cleaned)
+    cleaned = _WS_RE.sub(' ', cleaned)
     
     # Fix common JSON formatting issues
-    cleaned = re.sub(r',\s*}', '}', cleaned)  # Remove trailing commas before }
-    cleaned = re.sub(r',\s*]', ']', cleaned)  # Remove trailing commas before ]
-    cleaned = re.sub(r'}\s*{', '},{', cleaned)  # Fix missing commas between objects
-    
-    # Handle quotes in strings properly
-    cleaned = re.sub(r'(?<!\\)"([^"]*)"(?=\s*:)', r'"\1"', cleaned)  # Fix key quotes
+    cleaned = _TRAIL_OBJ_RE.sub('}', cleaned)  # Remove trailing commas before }
+    cleaned = _TRAIL_ARR_RE.sub(']', cleaned)  # Remove trailing commas before ]
+    cleaned = _ADJ_OBJ_RE.sub('},{', cleaned)  # Fix missing commas between objects
     
     # Ensure proper JSON structure
     cleaned = cleaned.strip()
@@ -107,12 +448,18 @@ def clean_json_string(json_str: str) -> str:
     json_end = -1
     
     # Find the first complete JSON object or array
-    for i, char in enumerate(cleaned):
-        if char in '{[':
-            json_start = i
-            break
+    starts = [i for i in (cleaned.find('{'), cleaned.find('[')) if i != -1]
+    if starts:
+        json_start = min(starts)
     
     if json_start != -1:
+        # Fast path: the C decoder finds the end of a well-formed value in one native pass
+        try:
+            _, json_end = _RAW_DECODER.raw_decode(cleaned, json_start)
+            return cleaned[json_start:json_end]
+        except ValueError:
+            pass
+        
         bracket_count = 0
         quote_open = False
         escape_next = False
@@ -152,17 +499,15 @@ def clean_json_string(json_str: str) -> str:
     
     return cleaned
 
-def safe_json_parse(json_str: str, fallback_dict: dict = None) -> dict:
-    """
-    Safe JSON parsing with multiple fallback strategies
-    """
-    if fallback_dict is None:
-        fallback_dict = {}
-    
+_PARSE_FAILED = object()
+
+
+def _parse_json_text(json_str: str):
+    """Parse text with the repair strategies; _PARSE_FAILED when none succeeds"""
     try:
-        # First attempt: direct parsing
-        return json.loads(json_str)
-    except json.JSONDecodeError:
+        # First attempt: direct parsing with orjson; the cleaned fallbacks stay on json
+        return orjson.loads(json_str)
+    except (orjson.JSONDecodeError, json.JSONDecodeError):
         try:
             # Second attempt: clean and parse
             cleaned = clean_json_string(json_str)
@@ -179,6 +524,24 @@ def safe_json_parse(json_str: str, fallback_dict: dict = None) -> dict:
             except:
                 pass
             
-            # Final fallback - reduce log level to avoid spam
-            logger.debug(f"JSON parsing failed, using fallback: {json_str[:100]}...")
-            return fallback_dict 
\ No newline at end of file
+            return _PARSE_FAILED
+
+
+def safe_json_parse(json_str: str, fallback_dict: dict = None) -> dict:
+    """
+    Safe JSON parsing with multiple fallback strategies
+    """
+    if fallback_dict is None:
+        fallback_dict = {}
+    
+    # Prose or empty replies (refusals, error text) cannot contain an object; skip the exception path
+    if not json_str or (isinstance(json_str, str) and '{' not in json_str and '[' not in json_str):
+        return fallback_dict
+    
+    parsed = _parse_json_text(json_str)
+    
+    if parsed is _PARSE_FAILED:
+        # Final fallback - reduce log level to avoid spam
+        logger.debug("JSON parsing failed, using fallback: %.100s...", json_str)
+        return fallback_dict
+    return parsed 
\ No newline at end of file
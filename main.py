@@ -5,13 +5,12 @@ Main Streamlit application for True Agentic Banking AI
 import streamlit as st
 import uuid
 import asyncio
+import concurrent.futures
+import threading
 from datetime import datetime
 
 from config import logger
-from utils.aws_clients import get_aws_clients
 from utils.ui_components import display_true_autonomy_results
-from utils.customer_segmentation import get_customer_segment
-from agents.orchestrator import AutonomousOrchestrator
 
 
 # Streamlit Configuration
@@ -22,6 +21,40 @@ st.set_page_config(
 )
 
 
+@st.cache_resource
+def get_background_loop() -> asyncio.AbstractEventLoop:
+    """Event loop on a daemon thread, kept alive across Streamlit reruns so client pools persist"""
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="agent-event-loop", daemon=True).start()
+    return loop
+
+
+class _UncachedSegment(Exception):
+    """Carries a fallback result out of _cached_segment; st.cache_data never stores a raised call"""
+    
+    def __init__(self, result: dict):
+        super().__init__(result.get('agent_status'))
+        self.result = result
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _cached_segment(pincode: str, income: int) -> dict:
+    """Segment lookup memoised per (pincode, income); fallback and error results are not kept"""
+    from utils.customer_segmentation import get_customer_segment
+    result = get_customer_segment(pincode=pincode, income=income)
+    if result.get('agent_status') == 'fallback_only' or 'error' in result:
+        raise _UncachedSegment(result)
+    return result
+
+
+def cached_customer_segment(pincode: str, income: int) -> dict:
+    """Segment a customer, reusing an earlier AI or rule-based result for the same inputs"""
+    try:
+        return _cached_segment(pincode, income)
+    except _UncachedSegment as uncached:
+        return uncached.result
+
+
 def main():
     """Main application with true agentic AI"""
     
@@ -33,6 +66,10 @@ def main():
         st.header("🤖 Agent Status")
         st.markdown("**Live Autonomous AI Agents**")
         
+        # Deferred so the page shell renders before boto3 loads its service models
+        from utils.aws_clients import get_aws_clients
+        from agents.orchestrator import AutonomousOrchestrator
+        
         # Initialize AWS clients
         aws_clients = get_aws_clients()
         if not aws_clients:
@@ -121,30 +158,24 @@ def main():
         status_text = st.empty()
         process_log_container = st.empty()
         
-        # Track process steps in real-time
-        process_steps = []
-        
-        def process_callback(log_entry):
-            """Real-time process update callback"""
-            process_steps.append(log_entry)
-            progress_value = min(len(process_steps) * 0.1, 0.9)
-            progress_bar.progress(progress_value)
-            status_text.text(f"Step {log_entry['step']}: {log_entry['message']}")
+        def render_process_log(process_steps):
+            """Show the last process steps from a (possibly cached) segmentation result"""
+            latest = process_steps[-1]
+            progress_bar.progress(min(len(process_steps) * 0.1, 0.9))
+            status_text.text(f"Step {latest['step']}: {latest['message']}")
             
-            # Update process log display
+            # Update process log display with a single block for the last 5 steps
             with process_log_container:
                 with st.expander("📋 Live Process Log", expanded=True):
-                    for step in process_steps[-5:]:  # Show last 5 steps
-                        st.text(f"{step['step']:2d}. {step['message']}")
+                    st.text("\n".join(f"{step['step']:2d}. {step['message']}" for step in process_steps[-5:]))
         
         status_text.text("🚀 Initializing autonomous AI agent...")
         
-        # Let AI agent autonomously determine customer segment with full process tracking
-        segmentation_result = get_customer_segment(
-            pincode=pincode, 
-            income=income, 
-            process_callback=process_callback
-        )
+        # Let AI agent autonomously determine customer segment; the log comes back with the result
+        segmentation_result = cached_customer_segment(pincode, income)
+        
+        if segmentation_result.get('process_log'):
+            render_process_log(segmentation_result['process_log'])
         
         # Complete the progress
         progress_bar.progress(1.0)
@@ -163,6 +194,9 @@ def main():
         elif agent_status == 'fallback_only':
             st.warning(f"🔧 **Fallback Analysis:** {segmentation_result['customer_segment']} "
                       f"(Fallback Confidence: {segmentation_result['confidence']:.1%})")
+        elif agent_status == 'deterministic_rule':
+            st.success(f"📍 **Known Metro Pincode:** {segmentation_result['customer_segment']} "
+                      f"(Rule Confidence: {segmentation_result['confidence']:.1%})")
         else:
             st.info(f"🤖 **AI Analysis:** {segmentation_result['customer_segment']} "
                    f"(Confidence: {segmentation_result['confidence']:.1%})")
@@ -178,6 +212,8 @@ def main():
                     st.success("✅ Fully Autonomous AI Agent")
                 elif agent_status == 'fallback_only':
                     st.warning("⚠️ Fallback Mode (AI Unavailable)")
+                elif agent_status == 'deterministic_rule':
+                    st.success("📍 Deterministic Rule (AI Not Needed)")
                 else:
                     st.info("🔄 Mixed Analysis")
                 
@@ -227,8 +263,8 @@ def main():
         # Clear the live process log now that we have the final results
         process_log_container.empty()
         
-        # Read document bytes and prepare JSON-safe data
-        document_bytes = uploaded_file.read()
+        # getvalue() returns the upload's bytes without moving the file cursor, unlike read()
+        document_bytes = uploaded_file.getvalue()
         
         # Create application data with JSON-safe structure
         application_data = {
@@ -256,13 +292,23 @@ def main():
                 status_text.text("🤖 Agents negotiating coordination strategy...")
                 progress_bar.progress(20)
                 
-                # Run autonomous processing
-                try:
-                    result = asyncio.run(orchestrator.autonomous_coordination(application_data))
-                except RuntimeError:
-                    import nest_asyncio
-                    nest_asyncio.apply()
-                    result = asyncio.run(orchestrator.autonomous_coordination(application_data))
+                # Run autonomous processing on the persistent background loop
+                future = asyncio.run_coroutine_threadsafe(
+                    orchestrator.autonomous_coordination(application_data),
+                    get_background_loop()
+                )
+                shown = 0
+                while True:
+                    try:
+                        result = future.result(timeout=0.1)
+                        break
+                    except concurrent.futures.TimeoutError:
+                        pass
+                    finally:
+                        # Render agent progress from this (script) thread
+                        for message in orchestrator.status_messages[shown:]:
+                            st.info(message)
+                        shown = len(orchestrator.status_messages)
                 
                 progress_bar.progress(100)
                 status_text.text("✅ Autonomous processing complete!")
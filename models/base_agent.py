@@ -2,95 +2,32 @@
 Base agent class for the Banking AI System
 """
 
-import json
 import uuid
 import asyncio
+import hashlib
+import threading
+from collections import OrderedDict, deque
 from datetime import datetime
-from typing import Dict, Any, List
-from dataclasses import asdict
+from itertools import islice
+from typing import Dict, Any, Deque, List, Tuple
+from dataclasses import asdict, replace
 
-from config import logger, CLAUDE_MODEL_ID, safe_json_parse, rate_limited_api_call, bedrock_api_call_with_retry
-from models.data_models import AgentGoal, AgentMemory, AgentPlan
+from config import (logger, CLAUDE_MODEL_ID, CLAUDE_FAST_MODEL_ID, BEDROCK_PROMPT_CACHING, dumps_pretty,
+                    safe_json_parse, rate_limited_api_call, bedrock_api_call_with_retry)
+from models.data_models import AgentGoal, AgentMemory, AgentPlan, memories_json
 
+# Exact-match Claude response cache shared by all agents (prompt hash -> response text)
+_PROMPT_CACHE: "OrderedDict[str, str]" = OrderedDict()
+_PROMPT_CACHE_SIZE = 1024
+_PROMPT_CACHE_LOCK = threading.Lock()  # Streamlit sessions run on separate threads
 
-class TrueAgent:
-    """Base class for truly autonomous agents"""
-    
-    def __init__(self, agent_id: str, aws_clients: Dict, agent_goals: List[AgentGoal]):
-        self.agent_id = agent_id
-        self.aws_clients = aws_clients
-        self.goals = agent_goals
-        self.memory_bank = []  # Learned experiences
-        self.current_plan = None
-        self.reflection_history = []
-        self.negotiation_history = []
-        self.adaptation_count = 0
-        
-    async def autonomous_process(self, input_data: Dict) -> Dict:
-        """Truly autonomous processing with goal-driven behavior"""
-        
-        # Step 1: Understand the situation and set dynamic goals
-        situation_analysis = await self._analyze_situation_autonomously(input_data)
-        
-        # Step 2: Create autonomous plan based on goals
-        plan = await self._create_autonomous_plan(situation_analysis)
-        
-        # Step 3: Execute plan with adaptive decision-making
-        execution_result = await self._execute_plan_autonomously(plan, input_data)
-        
-        # Step 4: Reflect on outcomes and learn
-        learning_insight = await self._reflect_and_learn(plan, execution_result)
-        
-        # Step 5: Adapt future behavior based on learning
-        await self._adapt_behavior(learning_insight)
-        
-        return {
-            'agent_id': self.agent_id,
-            'situation_analysis': situation_analysis,
-            'autonomous_plan': asdict(plan),
-            'execution_result': execution_result,
-            'learning_insight': learning_insight,
-            'adaptation_level': self.adaptation_count
-        }
-    
-    async def _analyze_situation_autonomously(self, input_data: Dict) -> Dict:
-        """Autonomous situation analysis using AI reasoning"""
-        
-        # Remove bytes from input data for JSON serialization
-        safe_input_data = {}
-        for k, v in input_data.items():
-            if k == 'document_bytes':
-                # Convert bytes to metadata for JSON serialization
-                safe_input_data['document_info'] = {
-                    'has_document': True,
-                    'size_bytes': len(v) if isinstance(v, bytes) else 0,
-                    'type': 'binary_data'
-                }
-            elif isinstance(v, bytes):
-                # Skip any other bytes data
-                continue
-            else:
-                # Only include JSON-serializable data
-                try:
-                    json.dumps(v)
-                    safe_input_data[k] = v
-                except (TypeError, ValueError):
-                    # Skip non-serializable data
-                    continue
-        
-        # Agent uses AI to understand situation from its perspective
-        analysis_prompt = f"""You are Agent {self.agent_id} with autonomous decision-making capabilities.
+# Cache misses currently being fetched (prompt hash -> task), so concurrent duplicates share one call
+_INFLIGHT_PROMPTS: Dict[str, "asyncio.Task[str]"] = {}
 
-Your Goals:
-{json.dumps([asdict(goal) for goal in self.goals], indent=2)}
+# Stable per-task instructions, sent ahead of the volatile context (see TrueAgent._bedrock_text)
+_ANALYSIS_INSTRUCTIONS = """You are Agent {agent_id} with autonomous decision-making capabilities.
 
-Your Past Learning:
-{json.dumps([asdict(memory) for memory in self.memory_bank[-5:]], indent=2) if self.memory_bank else "No prior experience"}
-
-Current Situation:
-{json.dumps(safe_input_data, indent=2)}
-
-As an autonomous agent, analyze this situation and determine:
+As an autonomous agent, analyze the situation below and determine:
 
 1. SITUATION ASSESSMENT:
    - What type of situation is this?
@@ -129,55 +66,7 @@ Respond in JSON format:
     "adaptation_recommendations": ["adapt1", "adapt2"]
 }}"""
 
-        try:
-            # Use retry mechanism for Bedrock API calls
-            response = await bedrock_api_call_with_retry(
-                self.aws_clients['bedrock'],
-                CLAUDE_MODEL_ID,
-                {
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": 1500,
-                    "messages": [{"role": "user", "content": analysis_prompt}],
-                    "temperature": 0.3  # Allow some creativity in analysis
-                }
-            )
-            
-            result = safe_json_parse(response['body'].read(), {})
-            ai_response = result.get('content', [{}])[0].get('text', '')
-            
-            # Parse AI analysis
-            # Use safe JSON parsing with fallback
-            analysis = safe_json_parse(ai_response, {
-                "situation_type": "unknown",
-                "key_challenges": ["AI analysis unavailable"],
-                "relevant_goals": ["primary"],
-                "confidence_level": 0.3,
-                "reasoning": "Using fallback analysis due to parsing failure"
-            })
-            
-            # Agent logs its autonomous reasoning
-            logger.info(f"Agent {self.agent_id} autonomous analysis: {analysis.get('reasoning', 'No reasoning provided')}")
-            
-            return analysis
-            
-        except Exception as e:
-            logger.error(f"Autonomous analysis failed for {self.agent_id}: {str(e)}")
-            # Fallback to basic analysis
-            return self._fallback_situation_analysis(input_data)
-    
-    async def _create_autonomous_plan(self, situation_analysis: Dict) -> AgentPlan:
-        """Create autonomous action plan based on situation and goals"""
-        
-        planning_prompt = f"""You are Agent {self.agent_id} creating an autonomous action plan.
-
-Situation Analysis:
-{json.dumps(situation_analysis, indent=2)}
-
-Your Goals:
-{json.dumps([asdict(goal) for goal in self.goals], indent=2)}
-
-Past Successful Strategies:
-{json.dumps([memory.action_taken for memory in self.memory_bank if memory.success_score > 0.7], indent=2)}
+_PLANNING_INSTRUCTIONS = """You are Agent {agent_id} creating an autonomous action plan.
 
 Create an autonomous plan that:
 1. Addresses the situation effectively
@@ -218,21 +107,279 @@ Plan Structure:
     "learning_objectives": ["what to learn from this"]
 }}"""
 
+_ADAPTATION_INSTRUCTIONS = """You are Agent {agent_id} deciding whether to adapt your current plan.
+
+As an autonomous agent, decide:
+1. Should you continue with the current plan?
+2. Should you adapt the plan based on new information?
+3. What specific adaptations would be most effective?
+
+Consider:
+- The success rate of the current step
+- Your overall goals
+- Past learning experiences
+- Available alternatives
+
+Respond in JSON:
+{{
+    "should_adapt": true/false,
+    "confidence": 0.0-1.0,
+    "reason": "detailed reasoning",
+    "suggested_adaptations": ["adaptation1", "adaptation2"],
+    "risk_assessment": "low/medium/high",
+    "alternative_strategies": ["strategy1", "strategy2"]
+}}"""
+
+_REFLECTION_INSTRUCTIONS = """You are Agent {agent_id} reflecting on your recent actions to learn and improve.
+
+Reflect on:
+1. What worked well and why?
+2. What didn't work and why?
+3. What patterns can you identify?
+4. What would you do differently next time?
+5. What new insights have you gained?
+6. How should you update your decision-making approach?
+
+Generate learning insights in JSON:
+{{
+    "success_factors": ["factor1", "factor2"],
+    "failure_factors": ["factor1", "factor2"],
+    "key_learnings": ["learning1", "learning2"],
+    "pattern_recognition": ["pattern1", "pattern2"],
+    "improvement_strategies": ["strategy1", "strategy2"],
+    "confidence_in_learning": 0.0-1.0,
+    "behavioral_adaptations": ["adaptation1", "adaptation2"],
+    "future_goal_adjustments": ["adjustment1", "adjustment2"]
+}}"""
+
+_NEGOTIATION_INSTRUCTIONS = """You are Agent {agent_id} negotiating with Agent {other_agent_id}.
+
+As an autonomous agent, formulate your negotiation strategy:
+
+1. What are your must-have requirements?
+2. What are you willing to compromise on?
+3. What value can you offer to the other agent?
+4. What do you think the other agent wants?
+5. What's your BATNA (Best Alternative to Negotiated Agreement)?
+
+Respond in JSON:
+{{
+    "negotiation_position": "your main position",
+    "must_have_requirements": ["req1", "req2"],
+    "compromise_areas": ["area1", "area2"],
+    "value_proposition": "what you offer",
+    "perceived_other_wants": ["want1", "want2"],
+    "batna": "your alternative if negotiation fails",
+    "opening_offer": "your initial proposal",
+    "concession_strategy": "how you'll make concessions",
+    "success_metrics": ["metric1", "metric2"]
+}}"""
+
+_JOINT_NEGOTIATION_INSTRUCTIONS = """You are mediating a negotiation between Agent {agent_a_id} (agent_a) and Agent {agent_b_id} (agent_b).
+
+For each agent, formulate its negotiation strategy so that the two proposals are consistent with each other:
+
+1. What are its must-have requirements?
+2. What is it willing to compromise on?
+3. What value can it offer to the other agent?
+4. What does the other agent want?
+5. What's its BATNA (Best Alternative to Negotiated Agreement)?
+
+Respond in JSON:
+{{
+    "agent_a_strategy": {{
+        "negotiation_position": "main position",
+        "must_have_requirements": ["req1", "req2"],
+        "compromise_areas": ["area1", "area2"],
+        "value_proposition": "what it offers",
+        "perceived_other_wants": ["want1", "want2"],
+        "batna": "alternative if negotiation fails",
+        "opening_offer": "initial proposal",
+        "concession_strategy": "how it will make concessions",
+        "success_metrics": ["metric1", "metric2"]
+    }},
+    "agent_b_strategy": {{ same fields as agent_a_strategy }}
+}}"""
+
+
+class TrueAgent:
+    """Base class for truly autonomous agents"""
+    
+    def __init__(self, agent_id: str, aws_clients: Dict, agent_goals: List[AgentGoal]):
+        self.agent_id = agent_id
+        self.aws_clients = aws_clients
+        self.goals = agent_goals
+        self.memory_bank: Deque[AgentMemory] = deque(maxlen=20)  # Learned experiences, oldest evicted first
+        self._successful_actions: Deque[str] = deque()  # action_taken of banked memories scoring > 0.7
+        self._recent_scores: Deque[float] = deque(maxlen=3)  # success_score of the last three memories
+        self._recent_sum = 0.0
+        self.current_plan = None
+        self.reflection_history = []
+        self.negotiation_history = []
+        self.adaptation_count = 0
+        self._goals_json = None  # Serialized goals, reset whenever self.goals is replaced
+        
+        # Instruction prefixes depend only on the agent id, so format them once
+        self._analysis_instructions = _ANALYSIS_INSTRUCTIONS.format(agent_id=agent_id)
+        self._planning_instructions = _PLANNING_INSTRUCTIONS.format(agent_id=agent_id)
+        self._adaptation_instructions = _ADAPTATION_INSTRUCTIONS.format(agent_id=agent_id)
+        self._reflection_instructions = _REFLECTION_INSTRUCTIONS.format(agent_id=agent_id)
+    
+    def _goals_prompt_json(self) -> str:
+        """Pretty JSON of the current goals, re-serialized only after the goals change"""
+        if self._goals_json is None:
+            self._goals_json = dumps_pretty([asdict(goal) for goal in self.goals])
+        return self._goals_json
+    
+    def _recent_memories(self, count: int) -> List[AgentMemory]:
+        """Last `count` memories, oldest first"""
+        return list(islice(reversed(self.memory_bank), count))[::-1]
+    
+    def _remember(self, memory: AgentMemory):
+        """Bank a memory, keeping the successful-actions index and recent-score sum in step"""
+        if len(self.memory_bank) == self.memory_bank.maxlen and self.memory_bank[0].success_score > 0.7:
+            self._successful_actions.popleft()
+        self.memory_bank.append(memory)
+        if memory.success_score > 0.7:
+            self._successful_actions.append(memory.action_taken)
+        
+        if len(self._recent_scores) == self._recent_scores.maxlen:
+            self._recent_sum -= self._recent_scores[0]
+        self._recent_scores.append(memory.success_score)
+        self._recent_sum += memory.success_score
+    
+    async def _bedrock_text(self, prompt: str, max_tokens: int, temperature: float, prefix: str = "",
+                            model_id: str = CLAUDE_MODEL_ID) -> str:
+        """Claude response text for prefix + prompt; byte-identical requests are served from the cache"""
+        key = hashlib.sha256(f"{model_id}|{max_tokens}|{temperature}|{prefix}|{prompt}".encode()).hexdigest()
+        with _PROMPT_CACHE_LOCK:
+            cached = _PROMPT_CACHE.get(key)
+            if cached is not None:
+                _PROMPT_CACHE.move_to_end(key)
+        if cached is not None:
+            return cached
+        
+        inflight = _INFLIGHT_PROMPTS.get(key)
+        if inflight is None or inflight.get_loop() is not asyncio.get_running_loop():
+            inflight = asyncio.ensure_future(self._fetch_text(key, prompt, max_tokens, temperature, prefix, model_id))
+            _INFLIGHT_PROMPTS[key] = inflight
+            inflight.add_done_callback(lambda task: _INFLIGHT_PROMPTS.pop(key, None) if _INFLIGHT_PROMPTS.get(key) is task else None)
+        # Shielded so one waiter being cancelled does not cancel the call the others share
+        return await asyncio.shield(inflight)
+    
+    async def _fetch_text(self, key: str, prompt: str, max_tokens: int, temperature: float, prefix: str,
+                          model_id: str) -> str:
+        """Invoke Claude for a cache miss and store the answer under key"""
+        content = [{"type": "text", "text": prompt}]
+        if prefix:
+            # The stable instructions go first so the model can reuse their prefill across requests
+            head = {"type": "text", "text": prefix}
+            if BEDROCK_PROMPT_CACHING:
+                head["cache_control"] = {"type": "ephemeral"}
+            content.insert(0, head)
+        
+        # Every prompt asks for a JSON object, so stop reading once it is complete
+        ai_response = await bedrock_api_call_with_retry(
+            self.aws_clients['bedrock'],
+            model_id,
+            {
+                "anthropic_version": "bedrock-2023-05-31",
+                "max_tokens": max_tokens,
+                "messages": [{"role": "user", "content": content}],
+                "temperature": temperature
+            },
+            stream=True,
+            stop_at_json_end=True
+        )
+        
+        # Only cache real answers so a transient empty reply is retried next time
+        if ai_response:
+            with _PROMPT_CACHE_LOCK:
+                _PROMPT_CACHE[key] = ai_response
+                if len(_PROMPT_CACHE) > _PROMPT_CACHE_SIZE:
+                    _PROMPT_CACHE.popitem(last=False)
+        return ai_response
+        
+    async def autonomous_process(self, input_data: Dict) -> Dict:
+        """Truly autonomous processing with goal-driven behavior"""
+        
+        # Step 1: Understand the situation and set dynamic goals
+        situation_analysis = await self._analyze_situation_autonomously(input_data)
+        
+        # Step 2: Create autonomous plan based on goals
+        plan = await self._create_autonomous_plan(situation_analysis)
+        
+        # Step 3: Execute plan with adaptive decision-making
+        execution_result = await self._execute_plan_autonomously(plan, input_data)
+        
+        # Step 4: Reflect on outcomes and learn
+        learning_insight = await self._reflect_and_learn(plan, execution_result)
+        
+        # Step 5: Adapt future behavior based on learning
+        await self._adapt_behavior(learning_insight)
+        
+        return {
+            'agent_id': self.agent_id,
+            'situation_analysis': situation_analysis,
+            'autonomous_plan': asdict(plan),
+            'execution_result': execution_result,
+            'learning_insight': learning_insight,
+            'adaptation_level': self.adaptation_count
+        }
+    
+    async def _analyze_situation_autonomously(self, input_data: Dict) -> Dict:
+        """Autonomous situation analysis using AI reasoning"""
+        
+        # Agent uses AI to understand situation from its perspective
+        # (dumps_pretty summarizes the raw document bytes instead of embedding them)
+        analysis_prompt = f"""Your Goals:
+{self._goals_prompt_json()}
+
+Your Past Learning:
+{memories_json(self._recent_memories(5)) if self.memory_bank else "No prior experience"}
+
+Current Situation:
+{dumps_pretty(input_data)}"""
+
         try:
-            # Use retry mechanism for Bedrock API calls
-            response = await bedrock_api_call_with_retry(
-                self.aws_clients['bedrock'],
-                CLAUDE_MODEL_ID,
-                {
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": 2000,
-                    "messages": [{"role": "user", "content": planning_prompt}],
-                    "temperature": 0.4  # Allow creativity in planning
-                }
-            )
+            # Bedrock call (with retry) unless this exact request was answered before
+            ai_response = await self._bedrock_text(analysis_prompt, prefix=self._analysis_instructions, max_tokens=1500, temperature=0.3)  # Allow some creativity in analysis
             
-            result = safe_json_parse(response['body'].read(), {})
-            ai_response = result.get('content', [{}])[0].get('text', '')
+            # Parse AI analysis
+            # Use safe JSON parsing with fallback
+            analysis = safe_json_parse(ai_response, {
+                "situation_type": "unknown",
+                "key_challenges": ["AI analysis unavailable"],
+                "relevant_goals": ["primary"],
+                "confidence_level": 0.3,
+                "reasoning": "Using fallback analysis due to parsing failure"
+            })
+            
+            # Agent logs its autonomous reasoning
+            logger.info(f"Agent {self.agent_id} autonomous analysis: {analysis.get('reasoning', 'No reasoning provided')}")
+            
+            return analysis
+            
+        except Exception as e:
+            logger.error(f"Autonomous analysis failed for {self.agent_id}: {str(e)}")
+            # Fallback to basic analysis
+            return self._fallback_situation_analysis(input_data)
+    
+    async def _create_autonomous_plan(self, situation_analysis: Dict) -> AgentPlan:
+        """Create autonomous action plan based on situation and goals"""
+        
+        planning_prompt = f"""Situation Analysis:
+{dumps_pretty(situation_analysis)}
+
+Your Goals:
+{self._goals_prompt_json()}
+
+Past Successful Strategies:
+{dumps_pretty(list(self._successful_actions))}"""
+
+        try:
+            # Bedrock call (with retry) unless this exact request was answered before
+            ai_response = await self._bedrock_text(planning_prompt, prefix=self._planning_instructions, max_tokens=2000, temperature=0.4)  # Allow creativity in planning
             
             # Use safe JSON parsing with fallback
             plan_data = safe_json_parse(ai_response, {
@@ -308,52 +455,18 @@ Plan Structure:
     async def _should_adapt_plan(self, step_result: Dict, current_plan: AgentPlan) -> Dict:
         """Autonomous decision on whether to adapt plan"""
         
-        adaptation_prompt = f"""You are Agent {self.agent_id} deciding whether to adapt your current plan.
-
-Current Plan:
+        adaptation_prompt = f"""Current Plan:
 {asdict(current_plan)}
 
 Latest Step Result:
-{json.dumps(step_result, indent=2)}
-
-Previous Adaptations: {self.adaptation_count}
+{dumps_pretty(step_result)}
 
-As an autonomous agent, decide:
-1. Should you continue with the current plan?
-2. Should you adapt the plan based on new information?
-3. What specific adaptations would be most effective?
-
-Consider:
-- The success rate of the current step
-- Your overall goals
-- Past learning experiences
-- Available alternatives
-
-Respond in JSON:
-{{
-    "should_adapt": true/false,
-    "confidence": 0.0-1.0,
-    "reason": "detailed reasoning",
-    "suggested_adaptations": ["adaptation1", "adaptation2"],
-    "risk_assessment": "low/medium/high",
-    "alternative_strategies": ["strategy1", "strategy2"]
-}}"""
+Previous Adaptations: {self.adaptation_count}"""
 
         try:
-            # Use retry mechanism for Bedrock API calls
-            response = await bedrock_api_call_with_retry(
-                self.aws_clients['bedrock'],
-                CLAUDE_MODEL_ID,
-                {
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": 800,
-                    "messages": [{"role": "user", "content": adaptation_prompt}],
-                    "temperature": 0.2
-                }
-            )
-            
-            result = safe_json_parse(response['body'].read(), {})
-            ai_response = result.get('content', [{}])[0].get('text', '')
+            # Bedrock call (with retry) unless this exact request was answered before
+            ai_response = await self._bedrock_text(adaptation_prompt, prefix=self._adaptation_instructions, max_tokens=400,
+                                                   temperature=0.2, model_id=CLAUDE_FAST_MODEL_ID)
             
             # Use safe JSON parsing with fallback
             decision = safe_json_parse(ai_response, {
@@ -382,52 +495,19 @@ Respond in JSON:
     async def _reflect_and_learn(self, plan: AgentPlan, execution_result: Dict) -> Dict:
         """Autonomous reflection and learning from outcomes"""
         
-        reflection_prompt = f"""You are Agent {self.agent_id} reflecting on your recent actions to learn and improve.
-
-Plan You Executed:
+        reflection_prompt = f"""Plan You Executed:
 {asdict(plan)}
 
 Execution Results:
-{json.dumps(execution_result, indent=2)}
+{dumps_pretty(execution_result)}
 
 Your Past Learning:
-{json.dumps([asdict(memory) for memory in self.memory_bank[-3:]], indent=2) if self.memory_bank else "No prior learning"}
-
-Reflect on:
-1. What worked well and why?
-2. What didn't work and why?
-3. What patterns can you identify?
-4. What would you do differently next time?
-5. What new insights have you gained?
-6. How should you update your decision-making approach?
-
-Generate learning insights in JSON:
-{{
-    "success_factors": ["factor1", "factor2"],
-    "failure_factors": ["factor1", "factor2"],
-    "key_learnings": ["learning1", "learning2"],
-    "pattern_recognition": ["pattern1", "pattern2"],
-    "improvement_strategies": ["strategy1", "strategy2"],
-    "confidence_in_learning": 0.0-1.0,
-    "behavioral_adaptations": ["adaptation1", "adaptation2"],
-    "future_goal_adjustments": ["adjustment1", "adjustment2"]
-}}"""
+{memories_json(self._recent_memories(3)) if self.memory_bank else "No prior learning"}"""
 
         try:
-            # Use retry mechanism for Bedrock API calls
-            response = await bedrock_api_call_with_retry(
-                self.aws_clients['bedrock'],
-                CLAUDE_MODEL_ID,
-                {
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": 1000,
-                    "messages": [{"role": "user", "content": reflection_prompt}],
-                    "temperature": 0.3
-                }
-            )
-            
-            result = safe_json_parse(response['body'].read(), {})
-            ai_response = result.get('content', [{}])[0].get('text', '')
+            # Bedrock call (with retry) unless this exact request was answered before
+            ai_response = await self._bedrock_text(reflection_prompt, prefix=self._reflection_instructions, max_tokens=600,
+                                                   temperature=0.3, model_id=CLAUDE_FAST_MODEL_ID)
             
             # Use safe JSON parsing with fallback
             learning_insight = safe_json_parse(ai_response, {
@@ -446,16 +526,12 @@ Generate learning insights in JSON:
                 success_score=execution_result['overall_success'],
                 learned_insight=learning_insight.get('key_learnings', ['No specific learning'])[0],
                 inclusion_impact=f"Learning improved agent decision-making capability by {execution_result['overall_success']:.1%}",
-                timestamp=datetime.now().isoformat()
+                timestamp=datetime.now().isoformat(timespec='seconds')
             )
             
-            self.memory_bank.append(memory)
+            self._remember(memory)
             self.reflection_history.append(learning_insight)
             
-            # Keep memory bank manageable
-            if len(self.memory_bank) > 20:
-                self.memory_bank = self.memory_bank[-15:]
-            
             return learning_insight
             
         except Exception as e:
@@ -465,25 +541,30 @@ Generate learning insights in JSON:
     async def _adapt_behavior(self, learning_insight: Dict):
         """Autonomously adapt behavior based on learning"""
         
+        # Goals are immutable; every adjustment swaps in a replaced copy
         # Update goals based on learning
         for adaptation in learning_insight.get('future_goal_adjustments', []):
-            if 'priority' in adaptation.lower():
+            if 'priority' in adaptation.lower() and 'high' in adaptation.lower():
                 # Agent autonomously adjusts goal priorities
-                for goal in self.goals:
-                    if 'high' in adaptation.lower() and goal.goal_type == 'primary':
-                        goal.priority = min(goal.priority + 1, 10)
+                self.goals = [
+                    replace(goal, priority=min(goal.priority + 1, 10)) if goal.goal_type == 'primary' else goal
+                    for goal in self.goals
+                ]
         
         # Adapt success criteria based on experience
-        for goal in self.goals:
-            if len(self.memory_bank) > 3:
-                avg_success = sum(m.success_score for m in self.memory_bank[-3:]) / 3
-                if avg_success > 0.8:
-                    # Agent becomes more ambitious
-                    if 'confidence' in goal.success_criteria:
-                        goal.success_criteria['confidence'] = min(
-                            goal.success_criteria['confidence'] + 0.05, 0.95
-                        )
+        if len(self.memory_bank) > 3:
+            avg_success = self._recent_sum / len(self._recent_scores)
+            if avg_success > 0.8:
+                # Agent becomes more ambitious
+                self.goals = [
+                    replace(goal, success_criteria={
+                        **goal.success_criteria,
+                        'confidence': min(goal.success_criteria['confidence'] + 0.05, 0.95)
+                    }) if 'confidence' in goal.success_criteria else goal
+                    for goal in self.goals
+                ]
         
+        self._goals_json = None
         logger.info(f"Agent {self.agent_id} adapted behavior based on learning: {learning_insight.get('behavioral_adaptations', [])}")
     
     def _fallback_situation_analysis(self, input_data: Dict) -> Dict:
@@ -513,68 +594,22 @@ Generate learning insights in JSON:
     async def negotiate_with_agent(self, other_agent: 'TrueAgent', negotiation_topic: str, context: Dict) -> Dict:
         """Autonomous negotiation with another agent"""
         
-        # Remove bytes from context for JSON serialization
-        safe_context = {}
-        for k, v in context.items():
-            if isinstance(v, bytes):
-                continue
-            else:
-                try:
-                    json.dumps(v)
-                    safe_context[k] = v
-                except (TypeError, ValueError):
-                    continue
-        
-        negotiation_prompt = f"""You are Agent {self.agent_id} negotiating with Agent {other_agent.agent_id}.
-
-Negotiation Topic: {negotiation_topic}
-Context: {json.dumps(safe_context, indent=2)}
+        negotiation_prompt = f"""Negotiation Topic: {negotiation_topic}
+Context: {dumps_pretty(context)}
 
 Your Goals:
-{json.dumps([asdict(goal) for goal in self.goals], indent=2)}
+{self._goals_prompt_json()}
 
 Other Agent's Known Goals (inferred):
-{json.dumps([asdict(goal) for goal in other_agent.goals], indent=2)}
+{other_agent._goals_prompt_json()}
 
 Past Negotiations:
-{json.dumps(self.negotiation_history[-3:], indent=2) if self.negotiation_history else "No prior negotiations"}
-
-As an autonomous agent, formulate your negotiation strategy:
-
-1. What are your must-have requirements?
-2. What are you willing to compromise on?
-3. What value can you offer to the other agent?
-4. What do you think the other agent wants?
-5. What's your BATNA (Best Alternative to Negotiated Agreement)?
-
-Respond in JSON:
-{{
-    "negotiation_position": "your main position",
-    "must_have_requirements": ["req1", "req2"],
-    "compromise_areas": ["area1", "area2"],
-    "value_proposition": "what you offer",
-    "perceived_other_wants": ["want1", "want2"],
-    "batna": "your alternative if negotiation fails",
-    "opening_offer": "your initial proposal",
-    "concession_strategy": "how you'll make concessions",
-    "success_metrics": ["metric1", "metric2"]
-}}"""
+{dumps_pretty(self.negotiation_history[-3:]) if self.negotiation_history else "No prior negotiations"}"""
+        negotiation_instructions = _NEGOTIATION_INSTRUCTIONS.format(agent_id=self.agent_id, other_agent_id=other_agent.agent_id)
 
         try:
-            # Use retry mechanism for Bedrock API calls
-            response = await bedrock_api_call_with_retry(
-                self.aws_clients['bedrock'],
-                CLAUDE_MODEL_ID,
-                {
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": 1200,
-                    "messages": [{"role": "user", "content": negotiation_prompt}],
-                    "temperature": 0.4
-                }
-            )
-            
-            result = safe_json_parse(response['body'].read(), {})
-            ai_response = result.get('content', [{}])[0].get('text', '')
+            # Bedrock call (with retry) unless this exact request was answered before
+            ai_response = await self._bedrock_text(negotiation_prompt, prefix=negotiation_instructions, max_tokens=1200, temperature=0.4)
             
             # Use safe JSON parsing with fallback
             negotiation_strategy = safe_json_parse(ai_response, {
@@ -589,7 +624,7 @@ Respond in JSON:
                 'with_agent': other_agent.agent_id,
                 'topic': negotiation_topic,
                 'strategy': negotiation_strategy,
-                'timestamp': datetime.now().isoformat()
+                'timestamp': datetime.now().isoformat(timespec='seconds')
             }
             
             self.negotiation_history.append(negotiation_record)
@@ -601,4 +636,54 @@ Respond in JSON:
             return {
                 "negotiation_position": "Cooperative approach",
                 "opening_offer": "Work together on shared goals"
-            } 
\ No newline at end of file
+            }
+    
+    async def negotiate_jointly(self, other_agent: 'TrueAgent', negotiation_topic: str, context: Dict) -> Tuple[Dict, Dict]:
+        """Both sides' negotiation strategies from one Bedrock call (self is agent_a, other_agent is agent_b)"""
+        
+        negotiation_prompt = f"""Negotiation Topic: {negotiation_topic}
+Context: {dumps_pretty(context)}
+
+Agent {self.agent_id} Goals:
+{self._goals_prompt_json()}
+
+Agent {other_agent.agent_id} Goals:
+{other_agent._goals_prompt_json()}
+
+Agent {self.agent_id} Past Negotiations:
+{dumps_pretty(self.negotiation_history[-3:]) if self.negotiation_history else "No prior negotiations"}
+
+Agent {other_agent.agent_id} Past Negotiations:
+{dumps_pretty(other_agent.negotiation_history[-3:]) if other_agent.negotiation_history else "No prior negotiations"}"""
+        negotiation_instructions = _JOINT_NEGOTIATION_INSTRUCTIONS.format(agent_a_id=self.agent_id,
+                                                                          agent_b_id=other_agent.agent_id)
+        fallback_strategy = {
+            "negotiation_position": "Cooperative approach",
+            "opening_offer": "Work together on shared goals",
+            "concession_strategy": "Collaborative",
+            "success_metrics": ["mutual_benefit"]
+        }
+        
+        try:
+            # One call covers both sides (two strategies need more room than a single one)
+            ai_response = await self._bedrock_text(negotiation_prompt, prefix=negotiation_instructions, max_tokens=2000, temperature=0.4)
+            strategies = safe_json_parse(ai_response, {})
+        except Exception as e:
+            logger.error(f"Joint negotiation failed for {self.agent_id} and {other_agent.agent_id}: {str(e)}")
+            strategies = {}
+        
+        # Record each side's strategy in its own history, as negotiate_with_agent does
+        results = []
+        for agent, counterpart, key in ((self, other_agent, 'agent_a_strategy'), (other_agent, self, 'agent_b_strategy')):
+            strategy = strategies.get(key)
+            if not isinstance(strategy, dict) or not strategy:
+                strategy = dict(fallback_strategy)
+            agent.negotiation_history.append({
+                'with_agent': counterpart.agent_id,
+                'topic': negotiation_topic,
+                'strategy': strategy,
+                'timestamp': datetime.now().isoformat(timespec='seconds')
+            })
+            results.append(strategy)
+        
+        return results[0], results[1]
@@ -2,10 +2,11 @@
 Data models for the Banking AI System
 """
 
-from dataclasses import dataclass
+import json
+from dataclasses import dataclass, field, fields
 from typing import Dict, Any, List, Optional
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AgentGoal:
     """Agent's autonomous goal definition for banking inclusion"""
     goal_type: str
@@ -15,7 +16,7 @@ class AgentGoal:
     social_impact_metric: str  # How this goal impacts financial inclusion
     deadline: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AgentMemory:
     """Agent's learning memory from banking decisions"""
     customer_segment: str  # Rural, Urban, Semi-Urban, Migrant, etc.
@@ -26,8 +27,17 @@ class AgentMemory:
     learned_insight: str
     inclusion_impact: str  # Impact on financial inclusion
     timestamp: str
+    # Memories are never edited after creation, so serialize once instead of per prompt
+    json_text: str = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        object.__setattr__(self, 'json_text', json.dumps({f.name: getattr(self, f.name) for f in fields(self) if f.init}, indent=2))
 
-@dataclass
+def memories_json(memories: List[AgentMemory]) -> str:
+    """JSON array of memories for prompts, built from each memory's cached serialization"""
+    return "[\n" + ",\n".join(memory.json_text for memory in memories) + "\n]"
+
+@dataclass(slots=True, frozen=True)
 class AgentPlan:
     """Agent's autonomous banking action plan"""
     plan_id: str
@@ -1,6 +1,13 @@
 # mumbai_region_test.py - Test everything works in ap-south-1 (Mumbai)
 import boto3
-import json
+from concurrent.futures import ThreadPoolExecutor
+from bedrock_dev_cache import cached_stream, caller_identity, fastest_region, list_models
+
+# One session for every client: endpoint data and service models are loaded once
+_SESSION = boto3.session.Session(region_name='ap-south-1')
+
+# Probed in parallel when Mumbai Bedrock fails; Singapore is usually the closest
+_FALLBACK_REGIONS = ['ap-southeast-1', 'us-east-1', 'us-west-2']
 
 def test_mumbai_setup():
     print("🇮🇳 Testing AWS setup for banking demo in Mumbai (ap-south-1)...\n")
@@ -11,27 +18,38 @@ def test_mumbai_setup():
         current_region = session.region_name
         print(f"📍 AWS Region: {current_region}")
         
-        sts = boto3.client('sts')
-        identity = sts.get_caller_identity()
+        # Create clients up front (client creation is not thread-safe), then run the
+        # independent probe calls concurrently; results are reported in order below
+        sts = _SESSION.client('sts')
+        s3 = _SESSION.client('s3')
+        dynamodb = _SESSION.client('dynamodb')
+        bedrock = _SESSION.client('bedrock')
+        # Identity is cached per access key, so switching credentials is always re-checked
+        credentials = _SESSION.get_credentials()
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            identity_future = pool.submit(caller_identity, sts, credentials.access_key if credentials else '')
+            buckets_future = pool.submit(s3.list_buckets)
+            tables_future = pool.submit(dynamodb.list_tables)
+            models_future = pool.submit(list_models, bedrock)
+        
+        identity = identity_future.result()
         print(f"👤 AWS User: {identity['Arn']}")
         print(f"🏢 Account: {identity['Account']}\n")
         
         # Test S3 in Mumbai
         print("Testing S3 in Mumbai...")
-        s3 = boto3.client('s3', region_name='ap-south-1')
-        buckets = s3.list_buckets()
+        buckets = buckets_future.result()
         print(f"✅ S3: {len(buckets['Buckets'])} buckets accessible")
         
         # Test DynamoDB in Mumbai
         print("Testing DynamoDB in Mumbai...")
-        dynamodb = boto3.client('dynamodb', region_name='ap-south-1')
-        tables = dynamodb.list_tables()
+        tables = tables_future.result()
         print(f"✅ DynamoDB: {len(tables['TableNames'])} tables in ap-south-1")
         
         # Test Textract in Mumbai
         print("Testing Textract in Mumbai...")
         try:
-            textract = boto3.client('textract', region_name='ap-south-1')
+            textract = _SESSION.client('textract')
             print("✅ Textract: Available in Mumbai")
         except Exception as e:
             print(f"⚠️  Textract: {str(e)}")
@@ -40,15 +58,20 @@ def test_mumbai_setup():
         # Test Bedrock in Mumbai
         print("Testing Bedrock in Mumbai...")
         try:
-            bedrock = boto3.client('bedrock', region_name='ap-south-1')
-            models = bedrock.list_foundation_models()
+            models = models_future.result()
             
-            print(f"✅ Bedrock: {len(models['modelSummaries'])} models available in Mumbai")
+            print(f"✅ Bedrock: {len(models)} models available in Mumbai")
             
-            # Look for key models
-            claude_models = [m for m in models['modelSummaries'] if 'claude' in m['modelId'].lower()]
-            titan_models = [m for m in models['modelSummaries'] if 'titan' in m['modelId'].lower()]
-            nova_models = [m for m in models['modelSummaries'] if 'nova' in m['modelId'].lower()]
+            # Look for key models (single pass, one lower() per model)
+            claude_models, titan_models, nova_models = [], [], []
+            for m in models:
+                model_id = m['modelId'].lower()
+                if 'claude' in model_id:
+                    claude_models.append(m)
+                elif 'titan' in model_id:
+                    titan_models.append(m)
+                elif 'nova' in model_id:
+                    nova_models.append(m)
             
             print(f"   📊 Available AI Models in Mumbai:")
             if claude_models:
@@ -68,7 +91,7 @@ def test_mumbai_setup():
             
             # Test actual Bedrock API call
             print("\n   Testing Bedrock API call in Mumbai...")
-            bedrock_runtime = boto3.client('bedrock-runtime', region_name='ap-south-1')
+            bedrock_runtime = _SESSION.client('bedrock-runtime')
             
             # Find best available model for test
             test_model = None
@@ -97,72 +120,39 @@ def test_mumbai_setup():
                 
                 test_prompt = "What is KYC in banking? Answer briefly."
                 
-                if 'claude' in test_model.lower():
-                    # Claude format
-                    response = bedrock_runtime.invoke_model(
-                        modelId=test_model,
-                        body=json.dumps({
-                            "anthropic_version": "bedrock-2023-05-31",
-                            "max_tokens": 50,
-                            "messages": [{"role": "user", "content": test_prompt}]
-                        })
-                    )
-                    result = json.loads(response['body'].read())
-                    ai_response = result['content'][0]['text']
-                    
-                elif 'nova' in test_model.lower():
-                    # Nova format
-                    response = bedrock_runtime.invoke_model(
-                        modelId=test_model,
-                        body=json.dumps({
-                            "messages": [{"role": "user", "content": test_prompt}],
-                            "max_tokens": 50
-                        })
-                    )
-                    result = json.loads(response['body'].read())
-                    ai_response = result['output']['message']['content'][0]['text']
-                    
-                elif 'titan' in test_model.lower():
-                    # Titan format
-                    response = bedrock_runtime.invoke_model(
-                        modelId=test_model,
-                        body=json.dumps({
-                            "inputText": test_prompt,
-                            "textGenerationConfig": {"maxTokenCount": 50}
-                        })
-                    )
-                    result = json.loads(response['body'].read())
-                    ai_response = result['results'][0]['outputText']
-                
-                print(f"   ✅ AI Response: '{ai_response[:60]}...'")
+                # Stream so the first tokens show up as soon as they are generated
+                print("   ✅ AI Response: '", end="", flush=True)
+                for piece in cached_stream(bedrock_runtime, test_model, test_prompt, 50):
+                    print(piece, end="", flush=True)
+                print("'")
                 print(f"   🎉 Bedrock fully functional in Mumbai!")
             
         except Exception as e:
             print(f"❌ Bedrock Error in Mumbai: {str(e)}")
-            print("   → Checking if models are available in us-east-1 as fallback...")
+            print(f"   → Checking fallback regions: {', '.join(_FALLBACK_REGIONS)}...")
             
-            # Fallback test to us-east-1
+            # Fallback test: pick the fastest responding region
             try:
-                bedrock_us = boto3.client('bedrock', region_name='us-east-1')
-                models_us = bedrock_us.list_foundation_models()
-                print(f"   ✅ Bedrock fallback: {len(models_us['modelSummaries'])} models in us-east-1")
+                fallback_region, fallback_models = fastest_region(_SESSION, _FALLBACK_REGIONS)
+                print(f"   ✅ Bedrock fallback: {len(fallback_models)} models in {fallback_region}")
                 print("   → We can use cross-region calls if needed")
             except:
-                print("   ❌ Bedrock not accessible in either region")
-        
-        print("\n🎯 Mumbai Region Assessment:")
-        print("✅ S3: Fully available")
-        print("✅ DynamoDB: Fully available") 
-        print("✅ Authentication: Working")
-        
-        print("\n🚀 MUMBAI SETUP READY!")
-        print("📍 Building banking demo in ap-south-1 (Mumbai)")
+                print("   ❌ Bedrock not accessible in Mumbai or any fallback region")
         
-        print("\n📋 Next steps:")
-        print("1. Create S3 bucket in Mumbai")
-        print("2. Create DynamoDB table in Mumbai") 
-        print("3. Build Streamlit app with Mumbai endpoints")
-        print("4. Use available AI models in Mumbai region")
+        # Static summary: written in a single call
+        print(
+            "\n🎯 Mumbai Region Assessment:\n"
+            "✅ S3: Fully available\n"
+            "✅ DynamoDB: Fully available\n"
+            "✅ Authentication: Working\n"
+            "\n🚀 MUMBAI SETUP READY!\n"
+            "📍 Building banking demo in ap-south-1 (Mumbai)\n"
+            "\n📋 Next steps:\n"
+            "1. Create S3 bucket in Mumbai\n"
+            "2. Create DynamoDB table in Mumbai\n"
+            "3. Build Streamlit app with Mumbai endpoints\n"
+            "4. Use available AI models in Mumbai region"
+        )
         
     except Exception as e:
         print(f"❌ Error: {str(e)}")
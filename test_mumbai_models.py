@@ -1,96 +1,88 @@
 # test_mumbai_models.py - Test EXACT models detected in Mumbai
 import boto3
-import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from bedrock_dev_cache import cached_converse
+
+_SESSION = boto3.session.Session(region_name='ap-south-1')
+
+def _probe(bedrock_runtime, model, test_prompt):
+    """Invoke one model with the test prompt; returns (ok, response text or error message)"""
+    try:
+        return True, cached_converse(bedrock_runtime, model['id'], test_prompt, 50)
+        
+    except Exception as e:
+        return False, str(e)
 
 def test_mumbai_available_models():
     print("🇮🇳 Testing EXACT models detected in Mumbai region test...\n")
     
     try:
-        bedrock_runtime = boto3.client('bedrock-runtime', region_name='ap-south-1')
+        bedrock_runtime = _SESSION.client('bedrock-runtime')
         
         # EXACT models from your Mumbai test results
         models_to_test = [
             {
                 'id': 'amazon.nova-pro-v1:0',
-                'name': 'Amazon Nova Pro',
-                'format': 'nova'
+                'name': 'Amazon Nova Pro'
             },
             {
                 'id': 'amazon.nova-lite-v1:0', 
-                'name': 'Amazon Nova Lite',
-                'format': 'nova'
+                'name': 'Amazon Nova Lite'
             },
             {
                 'id': 'amazon.titan-text-lite-v1',
-                'name': 'Amazon Titan Text Lite',
-                'format': 'titan'
+                'name': 'Amazon Titan Text Lite'
             },
             {
                 'id': 'amazon.titan-text-express-v1',
-                'name': 'Amazon Titan Text Express', 
-                'format': 'titan'
+                'name': 'Amazon Titan Text Express'
             }
         ]
         
         test_prompt = "What is KYC in banking? Answer briefly."
         working_models = []
         
-        for model in models_to_test:
-            try:
-                print(f"🧪 Testing {model['name']} ({model['id']})...")
-                
-                if model['format'] == 'nova':
-                    # Nova format
-                    response = bedrock_runtime.invoke_model(
-                        modelId=model['id'],
-                        body=json.dumps({
-                            "messages": [{"role": "user", "content": test_prompt}],
-                            "max_tokens": 50
-                        })
-                    )
-                    result = json.loads(response['body'].read())
-                    ai_response = result['output']['message']['content'][0]['text']
-                    
-                elif model['format'] == 'titan':
-                    # Titan format
-                    response = bedrock_runtime.invoke_model(
-                        modelId=model['id'],
-                        body=json.dumps({
-                            "inputText": test_prompt,
-                            "textGenerationConfig": {"maxTokenCount": 50}
-                        })
-                    )
-                    result = json.loads(response['body'].read())
-                    ai_response = result['results'][0]['outputText']
-                
-                print(f"✅ {model['name']}: WORKING!")
-                print(f"   Response: '{ai_response[:60]}...'")
-                print(f"   🎉 Ready for demo!\n")
+        # boto3 clients are thread-safe, so one client serves every probe; all four
+        # models are invoked at once and reported in list order
+        with ThreadPoolExecutor(max_workers=len(models_to_test)) as pool:
+            futures = [pool.submit(_probe, bedrock_runtime, model, test_prompt) for model in models_to_test]
+        
+        # Every probe has finished, so the report is assembled and written in one go
+        report = []
+        for model, future in zip(models_to_test, futures):
+            ok, outcome = future.result()
+            report.append(f"🧪 Testing {model['name']} ({model['id']})...")
+            
+            if ok:
+                report.append(f"✅ {model['name']}: WORKING!")
+                report.append(f"   Response: '{outcome[:60]}...'")
+                report.append(f"   🎉 Ready for demo!\n")
                 
                 working_models.append(model['id'])
-                
-            except Exception as e:
-                print(f"❌ {model['name']}: {str(e)}")
-                if "ValidationException" in str(e):
-                    print(f"   → Need to request access for {model['name']}")
-                elif "ResourceNotFoundException" in str(e):
-                    print(f"   → Model not found, might need different ID")
-                print()
-                continue
+            else:
+                report.append(f"❌ {model['name']}: {outcome}")
+                if "ValidationException" in outcome:
+                    report.append(f"   → Need to request access for {model['name']}")
+                elif "ResourceNotFoundException" in outcome:
+                    report.append(f"   → Model not found, might need different ID")
+                report.append('')
         
         # Summary
-        print("=" * 50)
+        report.append("=" * 50)
         if working_models:
-            print(f"🎉 SUCCESS! {len(working_models)} models working in Mumbai:")
+            report.append(f"🎉 SUCCESS! {len(working_models)} models working in Mumbai:")
             for model_id in working_models:
-                print(f"   ✅ {model_id}")
-            print(f"\n🚀 Your demo is ready to build!")
-            print(f"💰 Estimated cost: $0.25 for entire demo development")
+                report.append(f"   ✅ {model_id}")
+            report.append(f"\n🚀 Your demo is ready to build!")
+            report.append(f"💰 Estimated cost: $0.25 for entire demo development")
         else:
-            print("⚠️  No models working yet. Options:")
-            print("1. Request access in AWS Console → Bedrock → Model access")
-            print("2. Use mock responses for UI development")
-            print("3. Check model IDs might be slightly different")
+            report.append("⚠️  No models working yet. Options:")
+            report.append("1. Request access in AWS Console → Bedrock → Model access")
+            report.append("2. Use mock responses for UI development")
+            report.append("3. Check model IDs might be slightly different")
+        sys.stdout.write('\n'.join(report) + '\n')
+        sys.stdout.flush()
         
         return working_models
         
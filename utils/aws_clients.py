@@ -2,18 +2,92 @@
 AWS clients utility for the Banking AI System
 """
 
+import threading
+from collections.abc import Mapping
+
 import boto3
-from config import AWS_REGION
+from botocore.config import Config
+from config import AWS_REGION, BEDROCK_RETRY_CONFIG
+
+# Keep-alive pool shared by every client so Streamlit reruns reuse warm connections
+_CLIENT_CONFIG = Config(
+    max_pool_connections=32,
+    retries={'max_attempts': 10, 'mode': 'adaptive'},
+    tcp_keepalive=True,
+    connect_timeout=3,
+    read_timeout=60
+)
+_BEDROCK_CONFIG = _CLIENT_CONFIG.merge(Config(retries=BEDROCK_RETRY_CONFIG))
+# For callers with a cheap local fallback: 3 attempts in total (botocore still retries only throttling,
+# 5xx and connection errors, with full-jitter backoff capped at 20s), so an outage fails over quickly
+_BEDROCK_FAST_FAIL_CONFIG = _CLIENT_CONFIG.merge(Config(retries={'total_max_attempts': 3, 'mode': 'adaptive'}))
+
+# Built once per process; boto3 sessions are not safe to share across threads while creating clients
+_SESSION = boto3.session.Session(region_name=AWS_REGION)
+_CLIENTS_LOCK = threading.Lock()
+
+
+class _LazyClients(Mapping):
+    """Read-only mapping of AWS clients, each created on first access and reused afterwards"""
+
+    # key -> (factory, service name, config); keys naming the same service and config share one client
+    _SPECS = {
+        'textract': ('client', 'textract', _CLIENT_CONFIG),
+        'bedrock': ('client', 'bedrock-runtime', _BEDROCK_CONFIG),
+        'bedrock_runtime': ('client', 'bedrock-runtime', _BEDROCK_CONFIG),
+        'bedrock_runtime_fast_fail': ('client', 'bedrock-runtime', _BEDROCK_FAST_FAIL_CONFIG),
+        's3': ('client', 's3', _CLIENT_CONFIG),
+        'dynamodb': ('resource', 'dynamodb', _CLIENT_CONFIG)
+    }
+
+    def __init__(self):
+        self._cache = {}
+
+    def __getitem__(self, key):
+        factory, service_name, config = self._SPECS[key]
+        cache_key = (service_name, id(config))
+        client = self._cache.get(cache_key)
+        if client is None:
+            with _CLIENTS_LOCK:
+                client = self._cache.get(cache_key)
+                if client is None:
+                    try:
+                        client = getattr(_SESSION, factory)(service_name, config=config)
+                    except Exception as e:
+                        print(f"AWS client initialization failed: {e}")
+                        raise KeyError(key) from e
+                    self._cache[cache_key] = client
+        return client
+
+    def __iter__(self):
+        return iter(self._SPECS)
+
+    def __len__(self):
+        return len(self._SPECS)
+
+
+_CLIENTS = _LazyClients()
+
+def _warm_clients():
+    """Create every client ahead of first use; a failure is raised again on the first real access"""
+    for key in _CLIENTS:
+        _CLIENTS.get(key)
+
+# Build clients off the main thread so the first Streamlit request finds them ready
+threading.Thread(target=_warm_clients, name='aws-client-warmup', daemon=True).start()
 
 def get_aws_clients():
-    try:
-        return {
-            'textract': boto3.client('textract', region_name=AWS_REGION),
-            'bedrock': boto3.client('bedrock-runtime', region_name=AWS_REGION),
-            'bedrock_runtime': boto3.client('bedrock-runtime', region_name=AWS_REGION),
-            's3': boto3.client('s3', region_name=AWS_REGION),
-            'dynamodb': boto3.resource('dynamodb', region_name=AWS_REGION)
-        }
-    except Exception as e:
-        print(f"AWS client initialization failed: {e}")
-        return None 
\ No newline at end of file
+    """Shared lazy clients, or None when the session has no region or credentials to build them with"""
+    with _CLIENTS_LOCK:
+        credentials = _SESSION.get_credentials()
+    if not _SESSION.region_name or credentials is None:
+        print("AWS client initialization failed: no region or credentials configured")
+        return None
+    return _CLIENTS
+
+def batch_put(table_name, items, overwrite_by_pkeys=None):
+    """Write items through DynamoDB's batch writer: 25 puts per request, unprocessed items retried"""
+    table = _CLIENTS['dynamodb'].Table(table_name)
+    with table.batch_writer(overwrite_by_pkeys=overwrite_by_pkeys) as writer:
+        for item in items:
+            writer.put_item(Item=item)
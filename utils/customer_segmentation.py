@@ -3,13 +3,175 @@ Autonomous Customer Segmentation for Indian Banking
 AI Agent intelligently determines rural/urban classification using AWS Bedrock
 """
 
+import copy
 import json
+import re
+import time
 import asyncio
-from typing import Dict, List
-from config import logger, CLAUDE_MODEL_ID, bedrock_api_call_with_retry
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import orjson
+from config import (logger, BANKING_DEBUG, CLAUDE_MODEL_ID, Bulkhead, CircuitBreaker, CircuitOpenError,
+                    bedrock_api_call_with_retry, is_transient_error)
 from utils.aws_clients import get_aws_clients
 
 
+# Static prompt text, built once; only the customer list between header and footer is formatted per call
+_PROMPT_HEADER = """
+You are an autonomous banking AI agent specializing in Indian customer segmentation. 
+Your goal is to intelligently classify customers as Rural, Urban, or Semi-Urban based on available data.
+
+"""
+
+_PROMPT_FOOTER = """
+Segments: Urban = metros and major city hubs; Semi-Urban = tier-2 cities, district headquarters with good
+infrastructure, industrial towns near metros; Rural = villages, agricultural regions, remote/tribal areas.
+Start from the pincode hint when one is given, then weigh Indian geography, typical regional incomes,
+economic development and infrastructure.
+
+Respond with a JSON array holding exactly one object per customer listed above, in the same order, each in this exact format:
+[
+    {
+        "customer_segment": "Rural|Urban|Semi-Urban",
+        "confidence": 0.85,
+        "reasoning": "One or two sentences explaining your analysis",
+        "geographic_analysis": "One sentence on what the pincode tells you about location",
+        "economic_analysis": "One sentence on what the income suggests about lifestyle/location",
+        "banking_recommendations": ["rec1", "rec2", "rec3"]
+    }
+]
+"""
+
+# Request fields that never change; max_tokens and messages are filled in per call
+_REQUEST_TEMPLATE = {
+    "anthropic_version": "bedrock-2023-05-31",
+    "temperature": 0.3
+}
+
+# Local pincode knowledge by 3-digit prefix, injected as a one-line hint per customer
+_PINCODE_HINTS = {
+    '122': 'Gurgaon/Gurugram, NCR financial hub - definite Urban',
+    '121': 'Faridabad, NCR industrial - Urban',
+    '201': 'Noida, NCR IT hub - Urban',
+    '110': 'Delhi, national capital - Urban',
+    '400': 'Mumbai, financial capital - Urban',
+    '560': 'Bangalore, IT capital - Urban',
+    '600': 'Chennai, major metro - Urban',
+    '500': 'Hyderabad, IT hub - Urban',
+    '411': 'Pune, major city - Urban',
+    '700': 'Kolkata, major metro - Urban',
+    '160': 'Chandigarh, tier-2 city',
+    '226': 'Lucknow, tier-2 city',
+    '302': 'Jaipur, tier-2 city',
+    '380': 'Ahmedabad, tier-2 city',
+}
+
+# Outermost JSON array or object in a reply (leftmost opener to the last matching closer),
+# and the control characters that break JSON parsing (tab, newline and carriage return are kept)
+_JSON_RE = re.compile(r'\[.*\]|\{.*\}', re.DOTALL)
+_CTRL_RE = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+# Shared across instances and sessions: during a Bedrock outage segmentation goes straight to the fallback
+_BEDROCK_BREAKER = CircuitBreaker(failure_threshold=5, timeout_duration=30, success_threshold=2)
+
+# Bounds segmentation calls in flight across all sessions; past the queue, callers fall back at once
+_BEDROCK_BULKHEAD = Bulkhead(max_concurrent=16, queue_depth=64)
+
+# Rule-based recommendations per segment; immutable, so every result shares the same tuple
+_RECS_BY_SEGMENT = {
+    'Rural': ('Rural banking services', 'Agricultural loans', 'Micro-finance'),
+    'Urban': ('Premium banking', 'Investment products', 'Credit cards'),
+    'Semi-Urban': ('Flexible banking options', 'Small business loans')
+}
+
+# Known major urban pincode prefixes (every entry is a 3-digit postal district)
+_URBAN_PREFIXES = frozenset({
+    '122',  # Gurgaon/Gurugram (NCR)
+    '121',  # Faridabad (NCR)
+    '201',  # Noida (NCR)
+    '110',  # Delhi
+    '400',  # Mumbai
+    '560',  # Bangalore
+    '600',  # Chennai
+    '500',  # Hyderabad
+    '411',  # Pune
+    '700',  # Kolkata
+    '380',  # Ahmedabad
+    '302',  # Jaipur
+    '226',  # Lucknow
+})
+
+# Output budget per customer's JSON decision; 10 per call keeps a batch under Claude 3 Haiku's 4096 cap
+_TOKENS_PER_CASE = 350
+_BATCH_SIZE = 10
+_MAX_OUTPUT_TOKENS = 4096
+
+# EWMA of output tokens the model actually spends per decision, fed from Bedrock's usage report;
+# budgets get 25% headroom over it, so verbose replies shrink batches instead of being truncated
+_USAGE_EWMA_ALPHA = 0.2
+_output_tokens_per_case = _TOKENS_PER_CASE / 1.25
+
+
+def _case_token_budget() -> int:
+    return max(_TOKENS_PER_CASE, int(_output_tokens_per_case * 1.25))
+
+
+def _batch_size() -> int:
+    """Customers per Bedrock call that fit the output cap at the observed tokens per decision"""
+    return max(1, min(_BATCH_SIZE, _MAX_OUTPUT_TOKENS // _case_token_budget()))
+
+
+def _record_usage(usage: Dict, cases: int, latency_ms: float):
+    global _output_tokens_per_case
+    output_tokens = usage.get('output_tokens', 0)
+    if output_tokens:
+        _output_tokens_per_case += _USAGE_EWMA_ALPHA * (output_tokens / cases - _output_tokens_per_case)
+    logger.info("bedrock_usage %s", {
+        'bedrock_input_tokens': usage.get('input_tokens', 0),
+        'bedrock_output_tokens': output_tokens,
+        'latency_ms': round(latency_ms),
+        'batch_size': cases,
+        'output_tokens_per_case_ewma': round(_output_tokens_per_case, 1)
+    })
+
+# AI decisions by (pincode, income bucket, extra context) -> (stored at, result), LRU with a TTL
+_DECISION_CACHE: "OrderedDict[Tuple, Tuple[float, Dict]]" = OrderedDict()
+_DECISION_CACHE_SIZE = 4096
+_DECISION_TTL = 6 * 3600
+_INCOME_BUCKET = 50_000
+
+
+def _decision_key(case: Dict) -> Tuple:
+    context = {key: value for key, value in case.items() if key not in ('pincode', 'income')}
+    return case['pincode'], case['income'] // _INCOME_BUCKET, json.dumps(context, sort_keys=True, default=str)
+
+
+def _cached_decision(case: Dict) -> Optional[Dict]:
+    """Copy of a fresh cached AI decision for this case, re-labelled with its own pincode and income"""
+    key = _decision_key(case)
+    entry = _DECISION_CACHE.get(key)
+    if entry is None:
+        return None
+    stored_at, result = entry
+    if time.monotonic() - stored_at > _DECISION_TTL:
+        _DECISION_CACHE.pop(key, None)
+        return None
+    _DECISION_CACHE.move_to_end(key)
+    result = copy.deepcopy(result)
+    result['pincode'] = case['pincode'] or 'Not provided'
+    result['income'] = case['income']
+    return result
+
+
+def _remember_decision(case: Dict, result: Dict):
+    # A cache hit spends no tokens, so the original call's usage is not carried over
+    stored = copy.deepcopy({key: value for key, value in result.items() if key not in ('process_log', 'token_usage')})
+    _DECISION_CACHE[_decision_key(case)] = (time.monotonic(), stored)
+    if len(_DECISION_CACHE) > _DECISION_CACHE_SIZE:
+        _DECISION_CACHE.popitem(last=False)
+
+
 class AutonomousCustomerSegmentation:
     """
     Truly autonomous customer segmentation using AI intelligence
@@ -18,125 +180,147 @@ class AutonomousCustomerSegmentation:
     
     def __init__(self, aws_clients: Dict = None):
         self.aws_clients = aws_clients or get_aws_clients()
-        self.bedrock_runtime = self.aws_clients.get('bedrock_runtime') if self.aws_clients else None
+        # Short retry budget: a failed call falls back to local rules rather than waiting out an outage
+        self.bedrock_runtime = (self.aws_clients.get('bedrock_runtime_fast_fail') or self.aws_clients.get('bedrock_runtime')
+                                if self.aws_clients else None)
         self.process_log = []  # Track the entire process
+        self.debug = BANKING_DEBUG
     
     async def autonomous_segmentation(self, pincode: str = None, income: int = 0, 
                                      process_callback=None, **kwargs) -> Dict:
         """
         Let the AI agent autonomously determine customer segment with full process tracking
         """
+        results = await self.autonomous_segmentation_batch(
+            [{'pincode': pincode, 'income': income, **kwargs}], process_callback
+        )
+        return results[0]
+    
+    async def autonomous_segmentation_batch(self, cases: List[Dict], process_callback=None) -> List[Dict]:
+        """
+        Segment several customers, classifying up to _batch_size() of them per Bedrock call
+        """
         
         # Initialize process tracking
         self.process_log = []
         self._log_process("🚀 Starting Autonomous Customer Segmentation", process_callback)
-        self._log_process(f"📍 Input Data: Pincode={pincode}, Income=₹{income:,}", process_callback)
+        for case in cases:
+            self._log_process(f"📍 Input Data: Pincode={case.get('pincode')}, Income=₹{case.get('income', 0):,}", process_callback)
+        
+        cases = [{'pincode': None, 'income': 0, **case} for case in cases]
+        
+        results = []
+        for case in cases:
+            # Metro pincode with an urban-level income: the answer is Urban whatever the AI says
+            if self._is_definitely_urban_pincode(case['pincode']) and case['income'] >= 700000:
+                results.append(await self._deterministic_urban_result(case['pincode'], case['income'], process_callback))
+                continue
+            
+            # Reuse recent AI decisions for the same pincode and income bucket
+            result = _cached_decision(case)
+            if result is not None:
+                self._log_process(f"🗄️ Cache hit: reusing AI decision for Pincode={result['pincode']} "
+                                f"({result['customer_segment']})", process_callback)
+                result['process_log'] = self.process_log
+            results.append(result)
+        misses = [index for index, result in enumerate(results) if result is None]
+        if not misses:
+            return results
         
         # Check AWS Bedrock availability
         if not self.bedrock_runtime:
             self._log_process("⚠️ AWS Bedrock unavailable - switching to fallback mode", process_callback)
-            return await self._fallback_with_process(pincode, income, process_callback)
+            for index in misses:
+                results[index] = await self._fallback_with_process(cases[index]['pincode'], cases[index]['income'], process_callback)
+            return results
         
         self._log_process("✅ AWS Bedrock connected - activating autonomous AI agent", process_callback)
         
         # Prepare autonomous analysis
         self._log_process("🧠 AI Agent: Analyzing Indian geographic and economic patterns", process_callback)
         
-        analysis_prompt = f"""
-You are an autonomous banking AI agent specializing in Indian customer segmentation. 
-Your goal is to intelligently classify customers as Rural, Urban, or Semi-Urban based on available data.
-
-Customer Information:
-- Pincode: {pincode or 'Not provided'}
-- Annual Income: ₹{income:,}
-- Additional Context: {kwargs}
-
-CRITICAL PINCODE KNOWLEDGE - Use this to guide your analysis:
-
-URBAN AREAS (Definite Urban Classification):
-- Gurgaon/Gurugram (122xxx): Major financial hub, NCR, Fortune 500 companies
-  * 122001-122050: Central Gurgaon, highly urban
-  * 122018: South City II - Premium urban area
-- Mumbai (400xxx): Financial capital
-- Delhi (110xxx): National capital  
-- Bangalore (560xxx): IT capital
-- Chennai (600xxx): Major metro
-- Hyderabad (500xxx): IT hub
-- Pune (411xxx): Major city
-- Kolkata (700xxx): Major metro
-- Noida (201xxx): NCR IT hub
-- Faridabad (121xxx): NCR industrial
-
-SEMI-URBAN AREAS:
-- Tier-2 cities: Chandigarh, Lucknow, Jaipur, Ahmedabad
-- District headquarters with good infrastructure
-- Industrial towns near metros
-
-RURAL AREAS:
-- Village pincodes (usually lower population density)
-- Agricultural regions
-- Remote/tribal areas
-
-Task: Use your knowledge of Indian geography, economics, and demographics to autonomously determine:
-1. Customer segment (Rural/Urban/Semi-Urban)
-2. Confidence level (0.0 to 1.0) 
-3. Your reasoning process
-4. Banking recommendations
-
-SPECIAL ATTENTION: If pincode starts with 122xxx (Gurgaon), classify as URBAN with high confidence.
-
-Consider factors like:
-- Specific pincode knowledge above
-- Income levels typical for different regions
-- Economic development patterns across India
-- Infrastructure and connectivity indicators
-
-Think autonomously and provide your intelligent analysis.
-
-Respond in this exact JSON format:
-{{
-    "customer_segment": "Rural|Urban|Semi-Urban",
-    "confidence": 0.85,
-    "reasoning": "Detailed explanation of your autonomous analysis",
-    "geographic_analysis": "What the pincode tells you about location",
-    "economic_analysis": "What the income suggests about lifestyle/location",
-    "banking_recommendations": ["rec1", "rec2", "rec3"]
-}}
-"""
-
+        size = _batch_size()
+        batches = [misses[i:i + size] for i in range(0, len(misses), size)]
+        batch_results = await asyncio.gather(*(
+            self._segment_batch([cases[index] for index in batch], process_callback) for batch in batches
+        ))
+        for batch, batch_result in zip(batches, batch_results):
+            for index, result in zip(batch, batch_result):
+                results[index] = result
+                if result['classification_method'] == 'autonomous_ai_analysis':
+                    _remember_decision(cases[index], result)
+        return results
+    
+    async def _segment_batch(self, cases: List[Dict], process_callback=None) -> List[Dict]:
+        """Classify one batch of customers with a single Bedrock call"""
+        
         try:
             # Call autonomous AI agent
             self._log_process("🤖 Calling AWS Bedrock Claude AI agent for autonomous analysis", process_callback)
-            response = await self._call_bedrock_ai(analysis_prompt, process_callback)
+            started = time.monotonic()
+            response, usage = await self._call_bedrock_ai(
+                self._build_prompt(cases), process_callback,
+                max_tokens=min(_MAX_OUTPUT_TOKENS, _case_token_budget() * len(cases))
+            )
+            latency_ms = (time.monotonic() - started) * 1000
+            _record_usage(usage, len(cases), latency_ms)
+            token_usage = {
+                'input_tokens': usage.get('input_tokens', 0),
+                'output_tokens': usage.get('output_tokens', 0),
+                'latency_ms': round(latency_ms),
+                'batch_size': len(cases)
+            }
             
             # Parse agent's autonomous decision
             self._log_process("📊 AI Agent: Processing autonomous decision", process_callback)
-            result = await self._parse_agent_response(response, pincode, income, process_callback)
-            
-            self._log_process(f"✅ Autonomous Analysis Complete: {result['customer_segment']} "
-                            f"({result['confidence']:.0%} confidence)", process_callback)
+            results = await self._parse_agent_response(response, cases, process_callback)
             
-            # Add process log to result
-            result['process_log'] = self.process_log
-            result['agent_status'] = 'fully_autonomous'
+            for result in results:
+                self._log_process(f"✅ Autonomous Analysis Complete: {result['customer_segment']} "
+                                f"({result['confidence']:.0%} confidence)", process_callback)
+                
+                # Add process log to result
+                result['process_log'] = self.process_log
+                result.setdefault('agent_status', 'fully_autonomous')
+                if result['classification_method'] == 'autonomous_ai_analysis':
+                    result['token_usage'] = token_usage
             
-            return result
+            return results
             
         except Exception as e:
             self._log_process(f"❌ AI Agent Error: {str(e)}", process_callback)
             self._log_process("🔄 Switching to fallback analysis", process_callback)
-            return await self._fallback_with_process(pincode, income, process_callback)
+            return [await self._fallback_with_process(case['pincode'], case['income'], process_callback) for case in cases]
+    
+    def _build_prompt(self, cases: List[Dict]) -> str:
+        """Analysis prompt asking for one JSON decision per customer, in input order"""
+        customers = []
+        for number, case in enumerate(cases, 1):
+            context = {key: value for key, value in case.items() if key not in ('pincode', 'income')}
+            hint = _PINCODE_HINTS.get((case['pincode'] or '')[:3], 'no local hint')
+            customers.append(
+                f"{number}. Pincode: {case['pincode'] or 'Not provided'} ({hint}) | "
+                f"Annual Income: ₹{case['income']:,} | Additional Context: {context}"
+            )
+        customer_lines = '\n'.join(customers)
+        
+        return (_PROMPT_HEADER +
+                f"Customers ({len(cases)}, classify each one independently):\n{customer_lines}\n" +
+                _PROMPT_FOOTER)
     
-    async def _call_bedrock_ai(self, prompt: str, process_callback=None) -> str:
-        """Call AWS Bedrock for autonomous AI analysis with process tracking"""
+    async def _call_bedrock_ai(self, prompt: str, process_callback=None, max_tokens: int = 1000) -> Tuple[str, Dict]:
+        """Call AWS Bedrock for autonomous AI analysis with process tracking; returns (text, usage)"""
+        
+        if not _BEDROCK_BREAKER.can_execute():
+            self._log_process("⚡ AWS Bedrock circuit open after repeated failures - skipping AI call", process_callback)
+            raise CircuitOpenError("Bedrock circuit breaker is open")
         
         try:
             self._log_process("📡 Sending request to AWS Bedrock Claude model with retry protection", process_callback)
             
             request_body = {
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": 1000,
-                "temperature": 0.3,
+                **_REQUEST_TEMPLATE,
+                "max_tokens": max_tokens,
                 "messages": [
                     {
                         "role": "user",
@@ -146,88 +330,132 @@ Respond in this exact JSON format:
             }
             
             # Use retry mechanism for Bedrock API calls
-            response = await bedrock_api_call_with_retry(
-                self.bedrock_runtime,
-                CLAUDE_MODEL_ID,
-                request_body
-            )
+            async with _BEDROCK_BULKHEAD:
+                response_body = await bedrock_api_call_with_retry(
+                    self.bedrock_runtime,
+                    CLAUDE_MODEL_ID,
+                    request_body,
+                    decode=True
+                )
             
-            response_body = json.loads(response['body'].read())
+            _BEDROCK_BREAKER.record_success()
             ai_response = response_body['content'][0]['text']
             
             self._log_process(f"✅ AWS Bedrock Response Received: {len(ai_response)} characters", process_callback)
-            self._log_process(f"🧠 AI Agent Reasoning Preview: {ai_response[:100]}...", process_callback)
+            if self.debug:
+                self._log_process(f"🧠 AI Agent Reasoning Preview: {ai_response[:100]}...", process_callback)
             
-            return ai_response
+            return ai_response, response_body.get('usage', {})
             
         except Exception as e:
+            if is_transient_error(e):
+                _BEDROCK_BREAKER.record_failure()
             self._log_process(f"❌ AWS Bedrock Call Failed: {str(e)}", process_callback)
             logger.error(f"Bedrock AI call failed: {str(e)}")
             raise
     
-    async def _parse_agent_response(self, ai_response: str, pincode: str, income: int, 
-                                   process_callback=None) -> Dict:
-        """Parse the autonomous agent's response with process tracking"""
+    async def _parse_agent_response(self, ai_response: str, cases: List[Dict], 
+                                   process_callback=None) -> List[Dict]:
+        """Parse the autonomous agent's decisions, one per case, with process tracking"""
         
         try:
             self._log_process("🔍 Parsing AI agent's autonomous decision", process_callback)
             
-            # Clean and extract JSON from AI response
-            json_start = ai_response.find('{')
-            json_end = ai_response.rfind('}') + 1
-            
-            if json_start == -1 or json_end == 0:
+            # Extract the JSON array (or a lone object) from AI response
+            match = _JSON_RE.search(ai_response)
+            if not match:
                 raise ValueError("No JSON found in AI response")
             
-            json_str = ai_response[json_start:json_end]
-            
             self._log_process("🧹 Cleaning JSON response from control characters", process_callback)
             # Clean any control characters that might cause JSON parsing issues
-            json_str = ''.join(char for char in json_str if ord(char) >= 32 or char in '\n\r\t')
+            json_str = _CTRL_RE.sub('', match.group(0))
             
             self._log_process("📋 Validating AI agent's decision structure", process_callback)
-            agent_decision = json.loads(json_str)
-            
-            # Validate agent's decision
-            valid_segments = ['Rural', 'Urban', 'Semi-Urban']
-            if agent_decision.get('customer_segment') not in valid_segments:
-                raise ValueError(f"Invalid segment: {agent_decision.get('customer_segment')}")
-            
-            confidence = float(agent_decision.get('confidence', 0.5))
-            if not 0.0 <= confidence <= 1.0:
-                confidence = max(0.0, min(1.0, confidence))
-            
-            # CRITICAL: Override for known urban areas if AI misclassified
-            original_segment = agent_decision['customer_segment']
-            if pincode and self._is_definitely_urban_pincode(pincode):
-                if original_segment != 'Urban':
-                    self._log_process(f"🔧 CORRECTING: AI said {original_segment}, but {pincode} is definitely Urban", process_callback)
-                    agent_decision['customer_segment'] = 'Urban'
-                    confidence = max(0.85, confidence)  # High confidence for known urban areas
-                    agent_decision['reasoning'] = f"Corrected from {original_segment} to Urban based on pincode knowledge: {pincode} is in Gurgaon NCR"
-            
-            self._log_process(f"✅ AI Decision Validated: {agent_decision['customer_segment']} "
-                            f"with {confidence:.0%} confidence", process_callback)
-            
-            return {
-                'customer_segment': agent_decision['customer_segment'],
-                'confidence': round(confidence, 2),
-                'pincode': pincode or 'Not provided',
-                'income': income,
-                'reasoning': agent_decision.get('reasoning', 'AI autonomous analysis'),
-                'geographic_analysis': agent_decision.get('geographic_analysis', 'Location analysis'),
-                'economic_analysis': agent_decision.get('economic_analysis', 'Income analysis'),
-                'banking_recommendations': agent_decision.get('banking_recommendations', []),
-                'classification_method': 'autonomous_ai_analysis',
-                'agent_intelligence': 'aws_bedrock_claude',
-                'raw_ai_response': ai_response[:500] + "..." if len(ai_response) > 500 else ai_response
-            }
+            agent_decisions = orjson.loads(json_str)
+            if isinstance(agent_decisions, dict):
+                agent_decisions = [agent_decisions]
+            if len(agent_decisions) != len(cases):
+                raise ValueError(f"Expected {len(cases)} decisions, got {len(agent_decisions)}")
             
         except Exception as e:
             self._log_process(f"❌ Failed to parse AI response: {str(e)}", process_callback)
             logger.error(f"Failed to parse agent response: {str(e)}")
             logger.error(f"AI Response: {ai_response}")
-            return await self._fallback_with_process(pincode, income, process_callback)
+            return [await self._fallback_with_process(case['pincode'], case['income'], process_callback) for case in cases]
+        
+        results = []
+        for case, agent_decision in zip(cases, agent_decisions):
+            try:
+                results.append(self._validate_decision(agent_decision, case['pincode'], case['income'],
+                                                       ai_response, process_callback))
+            except Exception as e:
+                self._log_process(f"❌ Failed to parse AI response: {str(e)}", process_callback)
+                logger.error(f"Invalid agent decision for pincode {case['pincode']}: {str(e)}")
+                results.append(await self._fallback_with_process(case['pincode'], case['income'], process_callback))
+        return results
+    
+    def _validate_decision(self, agent_decision: Dict, pincode: str, income: int, ai_response: str,
+                           process_callback=None) -> Dict:
+        """Validate one decision from the agent and shape it into a segmentation result"""
+        
+        # Validate agent's decision
+        valid_segments = ['Rural', 'Urban', 'Semi-Urban']
+        if agent_decision.get('customer_segment') not in valid_segments:
+            raise ValueError(f"Invalid segment: {agent_decision.get('customer_segment')}")
+        
+        confidence = float(agent_decision.get('confidence', 0.5))
+        if not 0.0 <= confidence <= 1.0:
+            confidence = max(0.0, min(1.0, confidence))
+        
+        # CRITICAL: Override for known urban areas if AI misclassified
+        original_segment = agent_decision['customer_segment']
+        if pincode and self._is_definitely_urban_pincode(pincode):
+            if original_segment != 'Urban':
+                self._log_process(f"🔧 CORRECTING: AI said {original_segment}, but {pincode} is definitely Urban", process_callback)
+                agent_decision['customer_segment'] = 'Urban'
+                confidence = max(0.85, confidence)  # High confidence for known urban areas
+                agent_decision['reasoning'] = f"Corrected from {original_segment} to Urban based on pincode knowledge: {pincode} is in Gurgaon NCR"
+        
+        self._log_process(f"✅ AI Decision Validated: {agent_decision['customer_segment']} "
+                        f"with {confidence:.0%} confidence", process_callback)
+        
+        result = {
+            'customer_segment': agent_decision['customer_segment'],
+            'confidence': round(confidence, 2),
+            'pincode': pincode or 'Not provided',
+            'income': income,
+            'reasoning': agent_decision.get('reasoning', 'AI autonomous analysis'),
+            'geographic_analysis': agent_decision.get('geographic_analysis', 'Location analysis'),
+            'economic_analysis': agent_decision.get('economic_analysis', 'Income analysis'),
+            'banking_recommendations': agent_decision.get('banking_recommendations', []),
+            'classification_method': 'autonomous_ai_analysis',
+            'agent_intelligence': 'aws_bedrock_claude'
+        }
+        if self.debug:
+            result['raw_ai_response'] = ai_response[:500] + "..." if len(ai_response) > 500 else ai_response
+        return result
+    
+    async def _deterministic_urban_result(self, pincode: str, income: int, process_callback=None) -> Dict:
+        """Rule-based Urban result for a known metro pincode with an unambiguous income, no AI call"""
+        
+        hint = _PINCODE_HINTS.get(pincode[:3], 'major urban area')
+        self._log_process(f"📍 Pincode {pincode} ({hint}) with income ₹{income:,} ≥ ₹7,00,000 "
+                          f"→ Urban without AI call", process_callback)
+        
+        return {
+            'customer_segment': 'Urban',
+            'confidence': 0.9,
+            'pincode': pincode,
+            'income': income,
+            'reasoning': f"Pincode {pincode} is in a major urban area and the income is at urban levels (deterministic rule)",
+            'geographic_analysis': f"Known metro pincode: {hint}",
+            'economic_analysis': f'Income ₹{income:,} is typical of urban customers',
+            'banking_recommendations': _RECS_BY_SEGMENT['Urban'],
+            'classification_method': 'deterministic_rule',
+            'agent_intelligence': 'local_pincode_rules',
+            'process_log': self.process_log,
+            'agent_status': 'deterministic_rule'
+        }
     
     async def _fallback_with_process(self, pincode: str, income: int, process_callback=None) -> Dict:
         """Fallback classification with full process tracking"""
@@ -262,13 +490,7 @@ Respond in this exact JSON format:
         
         self._log_process("🏦 Generating basic banking recommendations", process_callback)
         
-        basic_recommendations = []
-        if segment == 'Rural':
-            basic_recommendations = ['Rural banking services', 'Agricultural loans', 'Micro-finance']
-        elif segment == 'Urban':
-            basic_recommendations = ['Premium banking', 'Investment products', 'Credit cards']
-        else:
-            basic_recommendations = ['Flexible banking options', 'Small business loans']
+        basic_recommendations = _RECS_BY_SEGMENT[segment]
         
         self._log_process(f"✅ Fallback Analysis Complete: {segment} ({confidence:.0%} confidence)", process_callback)
         
@@ -289,45 +511,21 @@ Respond in this exact JSON format:
         
         return result
     
-    def _is_definitely_urban_pincode(self, pincode: str) -> bool:
+    @staticmethod
+    def _is_definitely_urban_pincode(pincode: str) -> bool:
         """Check if a pincode is definitely in a major urban area"""
-        if not pincode:
-            return False
-        
-        # Known major urban pincode patterns
-        urban_patterns = [
-            '122',  # Gurgaon/Gurugram (NCR)
-            '121',  # Faridabad (NCR)
-            '201',  # Noida (NCR)
-            '110',  # Delhi
-            '400',  # Mumbai
-            '560',  # Bangalore
-            '600',  # Chennai
-            '500',  # Hyderabad
-            '411',  # Pune
-            '700',  # Kolkata
-            '380',  # Ahmedabad
-            '302',  # Jaipur
-            '226',  # Lucknow
-        ]
-        
-        # Check if pincode starts with any urban pattern
-        for pattern in urban_patterns:
-            if pincode.startswith(pattern):
-                return True
-        
-        return False
+        return bool(pincode) and pincode[:3] in _URBAN_PREFIXES
     
     def _log_process(self, message: str, callback=None):
         """Log process step and optionally call callback for real-time updates"""
-        timestamp = asyncio.get_event_loop().time()
+        # Same monotonic clock the event loop's time() reads, without looking up the loop
         log_entry = {
-            'timestamp': timestamp,
+            'timestamp': time.monotonic(),
             'message': message,
             'step': len(self.process_log) + 1
         }
         self.process_log.append(log_entry)
-        logger.info(f"Step {log_entry['step']}: {message}")
+        logger.info("Step %d: %s", log_entry['step'], message)
         
         # Call callback for real-time UI updates if provided
         if callback:
@@ -355,6 +553,21 @@ async def get_customer_segment_autonomous(pincode: str = None, income: int = 0,
     )
 
 
+async def get_customer_segments_many(cases: List[Dict], process_callback=None) -> List[Dict]:
+    """
+    Autonomous segmentation of many customers, fanned out concurrently on one shared segmenter
+    
+    Args:
+        cases: Dicts with pincode, income and any other customer data
+        process_callback: Function to call for real-time process updates
+    
+    Returns:
+        One segment classification per case, in input order
+    """
+    segmenter = AutonomousCustomerSegmentation()
+    return await segmenter.autonomous_segmentation_batch(cases, process_callback)
+
+
 # Synchronous wrapper for Streamlit compatibility
 def get_customer_segment(pincode: str = None, income: int = 0, process_callback=None, **kwargs) -> Dict:
     """
@@ -375,6 +588,25 @@ def get_customer_segment(pincode: str = None, income: int = 0, process_callback=
         return fallback_result
 
 
+def get_customer_segments(cases: List[Dict], process_callback=None) -> List[Dict]:
+    """
+    Synchronous wrapper for Streamlit: segments a list of customers in one event loop
+    """
+    try:
+        return asyncio.run(get_customer_segments_many(cases, process_callback))
+    except Exception as e:
+        logger.error(f"Autonomous segmentation error: {str(e)}")
+        segmenter = AutonomousCustomerSegmentation()
+        fallback_results = []
+        for case in cases:
+            fallback_result = asyncio.run(segmenter._fallback_with_process(
+                case.get('pincode'), case.get('income', 0), process_callback
+            ))
+            fallback_result['error'] = str(e)
+            fallback_results.append(fallback_result)
+        return fallback_results
+
+
 # Example usage and testing
 if __name__ == "__main__":
     # Test autonomous AI segmentation with process tracking
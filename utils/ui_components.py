@@ -4,6 +4,7 @@ UI components for the Banking AI System
 
 import streamlit as st
 from typing import Dict
+from config import dumps_pretty
 
 
 def display_true_autonomy_results(result: Dict):
@@ -47,23 +48,18 @@ def display_true_autonomy_results(result: Dict):
     # Agent Learning and Adaptation
     st.subheader("📚 Agent Learning & Adaptation")
     
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.write("**Document Agent Autonomy:**")
-        doc_metrics = autonomy_metrics.get('document_agent_autonomy', {})
-        st.write(f"• Learning Instances: {doc_metrics.get('learning_instances', 0)}")
-        st.write(f"• Adaptations Made: {doc_metrics.get('adaptations_count', 0)}")
-        st.write(f"• Negotiations: {doc_metrics.get('negotiation_instances', 0)}")
-        st.write(f"• Decisions Made: {doc_metrics.get('decisions_made', 0)}")
-    
-    with col2:
-        st.write("**Risk Agent Autonomy:**")
-        risk_metrics = autonomy_metrics.get('risk_agent_autonomy', {})
-        st.write(f"• Learning Instances: {risk_metrics.get('learning_instances', 0)}")
-        st.write(f"• Adaptations Made: {risk_metrics.get('adaptations_count', 0)}")
-        st.write(f"• Negotiations: {risk_metrics.get('negotiation_instances', 0)}")
-        st.write(f"• Decisions Made: {risk_metrics.get('decisions_made', 0)}")
+    # One markdown table instead of a column layout of per-metric writes
+    doc_metrics = autonomy_metrics.get('document_agent_autonomy', {})
+    risk_metrics = autonomy_metrics.get('risk_agent_autonomy', {})
+    metric_rows = [
+        (label, doc_metrics.get(key, 0), risk_metrics.get(key, 0))
+        for label, key in (("Learning Instances", 'learning_instances'),
+                           ("Adaptations Made", 'adaptations_count'),
+                           ("Negotiations", 'negotiation_instances'),
+                           ("Decisions Made", 'decisions_made'))
+    ]
+    st.markdown("| Metric | Document Agent | Risk Agent |\n|---|---|---|\n" +
+                "\n".join(f"| {label} | {doc} | {risk} |" for label, doc, risk in metric_rows))
     
     # Overall System Autonomy
     system_autonomy = autonomy_metrics.get('system_autonomy_score', 0.5)
@@ -80,16 +76,15 @@ def display_true_autonomy_results(result: Dict):
     learning_outcomes = final_decision.get('learning_outcomes', [])
     if learning_outcomes:
         st.subheader("📖 System Learning Outcomes")
-        for outcome in learning_outcomes:
-            st.write(f"• {outcome}")
+        st.markdown("\n".join(f"- {outcome}" for outcome in learning_outcomes))
     
     # Next Steps
     next_steps = final_decision.get('next_steps', [])
     if next_steps:
         st.subheader("📝 Autonomous Next Steps")
-        for step in next_steps:
-            st.write(f"• {step}")
+        st.markdown("\n".join(f"- {step}" for step in next_steps))
     
     # Show detailed agent results
     with st.expander("🔍 Detailed Agent Analysis"):
-        st.json(result) 
\ No newline at end of file
+        # Serialized once with orjson (binary payloads summarized) rather than st.json's json.dumps
+        st.json(dumps_pretty(result)) 
\ No newline at end of file